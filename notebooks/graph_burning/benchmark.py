@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import math
+import time
+import tracemalloc
+import argparse
+import numpy as np
+
+from .burn_tree import *
+from .tree_families import FAMILIES, TREES_DIRECTORY, family_tree, fixture_trees
+from .verify_burning import verify_burning_sequence
+
+
+ALGORITHMS = {
+    'burn_tree': lambda tree: burn_tree(tree)[0],
+    'burn_tree_using_centers': burn_tree_using_centers,
+    'burn_most_leaves_reroot': burn_most_leaves_reroot,
+    'burn_most_leaves_fixed_root': burn_most_leaves_fixed_root,
+    'burn_most_removed': burn_most_removed,
+}
+
+
+parser = argparse.ArgumentParser(description='Time the burning heuristics on families of trees')
+parser.add_argument('--algs',
+                    type=str,
+                    nargs='+',
+                    default=list(ALGORITHMS),
+                    help='the heuristics to run (default all)')
+parser.add_argument('--families',
+                    type=str,
+                    nargs='+',
+                    default=None,
+                    help='the tree families to use, or fixtures for trees/*.mat (default all, with the '
+                         'fixtures if the trees directory is there, as it is in a checkout)')
+parser.add_argument('--sizes',
+                    type=int,
+                    nargs='+',
+                    default=[64, 128, 256, 512, 1024, 2048],
+                    help='the orders of trees to generate (default 64 to 2048)')
+parser.add_argument('--max-seconds',
+                    type=float,
+                    default=30,
+                    help='stop growing a family for a heuristic once one run takes this long (default 30)')
+parser.add_argument('--no-memory',
+                    action='store_true',
+                    help='skip the second, traced run that measures peak memory')
+parser.add_argument('--seed',
+                    type=int,
+                    default=0,
+                    help='seed for the random families (default 0)')
+parser.add_argument('--output',
+                    type=str,
+                    default='benchmark_results.jsonl',
+                    help='file to append results to, one JSON object per line')
+parser.add_argument('--compare',
+                    type=str,
+                    default=None,
+                    help='earlier results file to compare the times against')
+
+
+def measure(alg, tree, memory=True):
+    '''Run one heuristic on one tree. Returns the burning sequence, the wall time in
+    seconds, and the peak memory allocated during a second run (None if not measured).'''
+    start = time.perf_counter()
+    burning_sequence = ALGORITHMS[alg](tree)
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        # Tracing slows everything down, so memory gets a run of its own
+        tracemalloc.start()
+        ALGORITHMS[alg](tree)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return burning_sequence, seconds, peak
+
+
+def benchmark_trees(family, sizes, seed=0):
+    '''Yield (name, tree) for each size of a family (or each fixture).'''
+    if family == 'fixtures':
+        yield from fixture_trees()
+        return
+
+    for n in sizes:
+        yield '{}_{}'.format(family, n), family_tree(family, n, rng=seed)
+
+
+def run(algs, families, sizes, max_seconds=30, memory=True, seed=0):
+    '''Yield one result (a dict) per heuristic and tree.'''
+    for family in families:
+        for alg in algs:
+            for name, tree in benchmark_trees(family, sizes, seed):
+                burning_sequence, seconds, peak = measure(alg, tree, memory)
+                yield {'alg': alg,
+                       'family': family,
+                       'tree': name,
+                       'n': tree.order(),
+                       'seconds': seconds,
+                       'peak_bytes': peak,
+                       'length': len(burning_sequence),
+                       'bound': math.ceil(math.sqrt(tree.order())),
+                       'valid': len(verify_burning_sequence(tree, burning_sequence)) == 0}
+
+                # Bigger trees of this family would only take longer
+                if seconds > max_seconds and family != 'fixtures':
+                    break
+
+
+def read_results(path):
+    '''Read a results file written by this script.'''
+    with open(path, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def scaling_exponents(results, min_seconds=1e-2):
+    '''Fit time ~ n^e for every (heuristic, family) with at least two sizes, ignoring
+    runs too quick to time reliably. Returns {(alg, family): e}.'''
+    groups = {}
+    for result in results:
+        if result['family'] != 'fixtures' and result['seconds'] >= min_seconds:
+            groups.setdefault((result['alg'], result['family']), []).append(result)
+
+    exponents = {}
+    for key, group in groups.items():
+        if len(set(result['n'] for result in group)) >= 2:
+            n = np.log([result['n'] for result in group])
+            seconds = np.log([result['seconds'] for result in group])
+            exponents[key] = float(np.polyfit(n, seconds, 1)[0])
+    return exponents
+
+
+def regressions(results, baseline, factor=1.5, min_seconds=1e-2):
+    '''Return (result, baseline result) pairs for the runs that took more than factor
+    times as long as the same heuristic on the same tree in the baseline.'''
+    before = {(result['alg'], result['tree']): result for result in baseline}
+    slower = []
+    for result in results:
+        old = before.get((result['alg'], result['tree']))
+        if old is not None and result['seconds'] > factor * max(old['seconds'], min_seconds):
+            slower.append((result, old))
+    return slower
+
+
+def main(argv=None):
+    '''Run the benchmark with the command line arguments argv (default sys.argv[1:]).'''
+    args = parser.parse_args(argv)
+    families = args.families
+    have_fixtures = os.path.isdir(TREES_DIRECTORY)
+    if families is None:
+        families = list(FAMILIES)
+        if have_fixtures:
+            families.append('fixtures')
+        else:
+            print("No trees directory at {}, so the fixtures are skipped".format(os.path.normpath(TREES_DIRECTORY)),
+                  file=sys.stderr)
+    elif 'fixtures' in families and not have_fixtures:
+        parser.error("there is no trees directory at {} for the fixtures".format(os.path.normpath(TREES_DIRECTORY)))
+
+    results = []
+    with open(args.output, 'a') as file:
+        for result in run(args.algs, families, args.sizes, args.max_seconds, not args.no_memory, args.seed):
+            print('{alg:28s} {tree:20s} n={n:6d} | {seconds:9.4f}s | length {length:3d} (bound {bound:3d})'.format(**result)
+                  + ('' if result['valid'] else ' | INVALID'), flush=True)
+            file.write(json.dumps(result) + '\n')
+            results.append(result)
+
+    print("\nScaling exponents (time ~ n^e):")
+    for (alg, family), exponent in sorted(scaling_exponents(results).items()):
+        print('{:28s} {:12s} e = {:.2f}'.format(alg, family, exponent))
+
+    if args.compare is not None:
+        slower = regressions(results, read_results(args.compare))
+        print("\n{} regressions against {}".format(len(slower), args.compare))
+        for result, old in slower:
+            print('{:28s} {:20s} {:9.4f}s -> {:9.4f}s'.format(result['alg'], result['tree'], old['seconds'], result['seconds']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,586 @@
+import math
+import numpy as np
+import json
+import os
+import time
+import tempfile
+import itertools
+from collections import deque
+from multiprocessing import Pool
+import argparse
+
+from .burn_tree import *
+from .exact_burning import burning_number
+from .verify_burning import verify_burning_sequence
+from .instrumentation import NULL_COLLECTOR, Collector
+from .free_trees import free_tree_layouts, level_sequence_to_parents, shard_starts
+from .result_store import ResultStore, make_record
+from .burning_cache import BurningCache
+from .tree_families import RANDOM_FAMILIES, family_tree
+from .lower_bounds import lower_bound
+from .structured_trees import burn_structured
+from .incremental import SummaryStore, derive_sequence, neighbour_lists, summary
+
+
+parser = argparse.ArgumentParser(description='Process which burning algorithm to use')
+parser.add_argument('--alg',
+                    type=str,
+                    help='the algorithm to use (frl, rrl, rrr, md, exact), a comma separated list of them, '
+                         'or all for every heuristic',
+                    required=True)
+parser.add_argument('--workers',
+                    type=int,
+                    default=1,
+                    help='number of worker processes to burn trees with (default 1, no pool)')
+parser.add_argument('--sample',
+                    type=int,
+                    default=None,
+                    help='burn this many random trees of each order instead of all trees (see --family)')
+parser.add_argument('--family',
+                    type=str,
+                    choices=RANDOM_FAMILIES,
+                    default='prufer',
+                    help='the random trees to sample with --sample (default prufer, uniform labelled trees)')
+parser.add_argument('--seed',
+                    type=int,
+                    default=0,
+                    help='seed for --sample (default 0)')
+parser.add_argument('--orders',
+                    type=int,
+                    nargs='+',
+                    default=None,
+                    help='the orders of trees to burn, instead of --min-order to --max-order')
+parser.add_argument('--min-order',
+                    type=int,
+                    default=2,
+                    help='the first order of trees to burn (default 2)')
+parser.add_argument('--max-order',
+                    type=int,
+                    default=None,
+                    help='the last order of trees to burn (default: keep going forever)')
+parser.add_argument('--chunk-size',
+                    type=int,
+                    default=500,
+                    help='number of trees in each shard handed to a worker (default 500)')
+parser.add_argument('--checkpoint',
+                    type=str,
+                    default=None,
+                    help='file to save sweep progress to (default checkpoint_<alg>.json)')
+parser.add_argument('--checkpoint-interval',
+                    type=float,
+                    default=60,
+                    help='seconds between checkpoints (default 60)')
+parser.add_argument('--resume',
+                    action='store_true',
+                    help='continue the sweep from the checkpoint file')
+parser.add_argument('--exact-check',
+                    action='store_true',
+                    help='compute the exact burning number of every counterexample found')
+parser.add_argument('--profile',
+                    action='store_true',
+                    help='time the phases of the heuristic and print a summary after each order')
+parser.add_argument('--prune',
+                    action='store_true',
+                    help='run the algorithms cheapest first and stop on a tree once one settles it: its sequence '
+                         'is within ceil(sqrt(n)) or meets a lower bound on b(T); paths, stars and some spiders and '
+                         'caterpillars are settled first by optimal sequences built directly')
+parser.add_argument('--store',
+                    type=str,
+                    default=None,
+                    help='SQLite file to record the result for every tree in (see result_store.py)')
+parser.add_argument('--cache',
+                    type=str,
+                    default=None,
+                    help='SQLite file caching exact burning numbers by canonical tree, shared between runs')
+parser.add_argument('--incremental',
+                    type=str,
+                    default=None,
+                    help='SQLite file of per-tree summaries (see incremental.py): burn each tree first with a '
+                         'sequence derived from its subtrees of order n - 1, and run the algorithms only when that '
+                         'is longer than ceil(sqrt(n)); the summaries of each order are kept for the next')
+parser.add_argument('--coordinate',
+                    type=str,
+                    default=None,
+                    help='coordinate a sweep shared between hosts through this directory: split each order into '
+                         'shards of --chunk-size trees for --work processes to claim (see shared_sweep.py)')
+parser.add_argument('--work',
+                    type=str,
+                    default=None,
+                    help='burn shards of the shared sweep in this directory, in --workers processes, until its '
+                         'coordinator is done')
+parser.add_argument('--lease',
+                    type=float,
+                    default=300,
+                    help='seconds a shared sweep shard stays claimed without a sign of life from its worker '
+                         'before it is handed out again (default 300)')
+
+
+# The order --prune runs the algorithms in, cheapest first
+CHEAPEST_FIRST = ['md', 'rrr', 'frl', 'rrl', 'exact']
+
+
+# One BurningCache per process and cache file
+caches = {}
+
+
+def exact_burning_number(tree, cache_path=None, distances=None):
+    '''Return b(T), reusing earlier results for isomorphic trees from the cache file if given.
+    The answer does not depend on the heuristic, so every sweep can share one cache.'''
+    if cache_path is None:
+        return burning_number(tree, distances)[0]
+
+    if cache_path not in caches:
+        caches[cache_path] = BurningCache(path=cache_path)
+    return len(caches[cache_path].burn(tree, 'exact', lambda tree: burning_number(tree)[1]))
+
+
+def compact_tree(parent):
+    '''Build the CompactTree for a parent array from free_trees. The vertices are numbered
+    as networkx's nonisomorphic_trees numbers them (its first edge is (1, 0), so vertex 1
+    comes first), which keeps ties in the heuristics broken exactly as in earlier sweeps.'''
+    n = len(parent)
+    if n < 2:
+        return CompactTree.from_parents(parent)
+
+    position = np.arange(n)
+    position[[0, 1]] = [1, 0]
+    children = np.arange(1, n)
+    edges = np.column_stack((position[children], position[parent[children]]))
+    return CompactTree.from_edges(n, edges, labels=position.tolist())
+
+
+def burn_trees(algs, trees, exact_check=False, profile=False, keep_records=False, cache_path=None, prune=False,
+               summary_path=None):
+    '''Burn each tree with each of the algorithms in algs. trees yields (layout, tree)
+    pairs, where layout is the level sequence of the tree (only needed for records). Each
+    tree's TreeDistances is built once and shared by all the algorithms. Returns a dict
+    with:
+
+    - trees: the number of trees burned;
+    - counterexamples: for each tree and algorithm whose burning sequence is longer than
+      ceil(sqrt(n)), a tuple (n, length, nodes, edges, exact, alg), where exact is the
+      true burning number of the tree if exact_check is set, else None;
+    - invalid: for each sequence that does not burn its tree, a tuple
+      (n, sequence, uncovered, nodes, edges, alg);
+    - stats: for each algorithm, [trees over the bound, invalid sequences, total
+      sequence length, seconds, trees burned];
+    - profiles: with profile, an instrumentation.Collector per algorithm (else None);
+    - records: with keep_records, result_store records, one per tree and algorithm.
+
+    Exact burning numbers are cached in cache_path, if given.
+
+    With prune, the algorithms run cheapest first, and the rest are skipped once a tree
+    is settled: a valid sequence is no longer than ceil(sqrt(n)), so the tree is not a
+    counterexample, or as long as lower_bounds.lower_bound, so it is optimal. An optimal
+    sequence also gives the exact burning number of a counterexample without a search.
+    Before any of them, paths, stars and the spiders and caterpillars that
+    structured_trees can certify are settled by their optimal sequences, which stats
+    counts under 'closed' (trees settled, seconds spent on every tree).
+
+    With summary_path, an incremental.SummaryStore file with the summaries of the trees
+    of order n - 1, each tree is first given the sequence incremental.derive_sequence
+    derives from them, and if it is within ceil(sqrt(n)) nothing else runs on the tree;
+    stats counts these under 'derived'. The result then also has summaries: the rows for
+    the store of the trees burned, each with the shortest valid sequence found for it.'''
+    collectors = {alg: Collector() if profile else NULL_COLLECTOR for alg in algs}
+    stats = {alg: [0, 0, 0, 0.0, 0] for alg in (['derived'] if summary_path else [])
+             + (['closed'] if prune else []) + algs}
+    run_order = sorted(algs, key=CHEAPEST_FIRST.index) if prune else algs
+    counterexamples = []
+    invalid = []
+    records = []
+    summaries = []
+    store = SummaryStore(summary_path) if summary_path else None
+    num_trees = 0
+    for layout, tree in trees:
+        n = tree.order()
+        upper_bound = math.ceil(math.sqrt(n))
+
+        # The shortest valid sequence found for the tree, in vertex indices
+        best = None
+        if store is not None:
+            started = time.perf_counter()
+            neighbours = neighbour_lists(tree)
+            index = {name: i for i, name in enumerate(tree.nodes())}
+            best = derive_sequence(neighbours, lambda code: store.get(n - 1, code))
+            derived_stats = stats['derived']
+            if best is not None and len(best) <= upper_bound:
+                summaries.append(summary(neighbours, best))
+                derived_stats[2] += len(best)
+                derived_stats[4] += 1
+                derived_stats[3] += time.perf_counter() - started
+                num_trees += 1
+                continue
+            derived_stats[3] += time.perf_counter() - started
+
+        distances = TreeDistances(tree)
+        lower = lower_bound(distances) if prune else None
+
+        exact = None
+        if prune:
+            started = time.perf_counter()
+            _, optimal = burn_structured(tree, lower)
+            closed_stats = stats['closed']
+            closed_stats[3] += time.perf_counter() - started
+            if optimal is not None:
+                exact = len(optimal)
+                closed_stats[0] += exact > upper_bound
+                closed_stats[2] += exact
+                closed_stats[4] += 1
+                if store is not None:
+                    best = [v if v == 'x' else index[v] for v in optimal]
+                if exact <= upper_bound:
+                    if store is not None:
+                        summaries.append(summary(neighbours, best))
+                    num_trees += 1
+                    continue
+
+        for alg in run_order:
+            collector = collectors[alg]
+            started = time.perf_counter()
+            burning_sequence = burn(tree, alg, collector, distances)
+            seconds = time.perf_counter() - started
+
+            with collector.phase('verify'):
+                uncovered = verify_burning_sequence(tree, burning_sequence)
+            if uncovered:
+                invalid.append((n, burning_sequence, uncovered, tree.nodes(), tree.edges(), alg))
+
+            if len(burning_sequence) > upper_bound:
+                # Only a tree with b(T) > ceil(sqrt(n)) is a counterexample to the conjecture;
+                # otherwise the heuristic just missed the optimum
+                if exact is None and not uncovered and len(burning_sequence) == lower:
+                    exact = lower
+                if exact_check and exact is None:
+                    exact = exact_burning_number(tree, cache_path, distances)
+                counterexamples.append((n, len(burning_sequence), tree.nodes(), tree.edges(), exact, alg))
+
+            if keep_records:
+                records.append(make_record(layout, alg, len(burning_sequence), not uncovered, seconds, exact))
+
+            alg_stats = stats[alg]
+            alg_stats[0] += len(burning_sequence) > upper_bound
+            alg_stats[1] += bool(uncovered)
+            alg_stats[2] += len(burning_sequence)
+            alg_stats[3] += seconds
+            alg_stats[4] += 1
+
+            if store is not None and not uncovered and (best is None or len(burning_sequence) < len(best)):
+                best = [v if v == 'x' else index[v] for v in burning_sequence]
+            if prune and not uncovered and (len(burning_sequence) <= upper_bound or len(burning_sequence) == lower):
+                break
+        if store is not None and best is not None:
+            summaries.append(summary(neighbours, best))
+        num_trees += 1
+
+    if store is not None:
+        store.close()
+    return {'trees': num_trees,
+            'counterexamples': counterexamples,
+            'invalid': invalid,
+            'stats': stats,
+            'profiles': collectors if profile else None,
+            'records': records,
+            'summaries': summaries}
+
+
+def burn_shard(algs, n, start, count, start_layout, exact_check=False, profile=False, keep_records=False,
+               cache_path=None, prune=False, summary_path=None):
+    '''Burn count trees of order n with each of the algorithms in algs, starting from tree
+    number start (whose level sequence is start_layout). Returns the result of burn_trees.'''
+    trees = ((layout, compact_tree(level_sequence_to_parents(layout)))
+             for layout in free_tree_layouts(n, start, count, start_layout=start_layout))
+    return burn_trees(algs, trees, exact_check, profile, keep_records, cache_path, prune, summary_path)
+
+
+def sample_shard(algs, family, n, start, count, seed=0, exact_check=False, profile=False, cache_path=None,
+                 prune=False):
+    '''Burn count random trees of order n from the given family (see
+    tree_families.RANDOM_FAMILIES) with each of the algorithms in algs. The random
+    generator is seeded with (seed, n, start), so a shard draws the same trees whichever
+    worker runs it. Returns the result of burn_trees.'''
+    rng = np.random.default_rng([seed, n, start])
+    trees = ((None, family_tree(family, n, rng)) for _ in range(count))
+    return burn_trees(algs, trees, exact_check, profile, cache_path=cache_path, prune=prune)
+
+
+def run_shards(function, shards, pool=None, max_in_flight=2):
+    '''Yield function(*arguments) for each tuple of arguments in shards, in order. With
+    a pool, at most max_in_flight shards are queued at a time.'''
+    if pool is None:
+        for arguments in shards:
+            yield function(*arguments)
+        return
+
+    pending = deque()
+    for arguments in shards:
+        pending.append(pool.apply_async(function, arguments))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().get()
+
+    while pending:
+        yield pending.popleft().get()
+
+
+def sweep_order(n, algs, pool=None, chunk_size=500, max_in_flight=2, start=0, exact_check=False,
+                profile=False, keep_records=False, cache_path=None, prune=False, summary_path=None):
+    '''Burn all non-isomorphic trees of order n, in shards of chunk_size trees, skipping
+    the first start trees. Each shard is sent as its first level sequence, and the worker
+    enumerates the trees itself. With a pool, at most max_in_flight shards are queued at
+    a time, and results are reported in the order the trees were generated. Yields the
+    result of burn_shard for each shard.'''
+    shards = ((algs, n, index, count, layout, exact_check, profile, keep_records, cache_path, prune, summary_path)
+              for index, layout, count in shard_starts(n, chunk_size, start))
+    return run_shards(burn_shard, shards, pool, max_in_flight)
+
+
+def sample_order(n, algs, family, num_samples, seed=0, pool=None, chunk_size=500, max_in_flight=2, start=0,
+                 exact_check=False, profile=False, cache_path=None, prune=False):
+    '''Burn num_samples random trees of order n from the given family, in shards of
+    chunk_size trees, skipping the first start trees. As each shard is seeded by its
+    position, resuming with the same seed and chunk size draws the same trees as an
+    uninterrupted run. Yields the result of sample_shard for each shard.'''
+    shards = ((algs, family, n, index, min(chunk_size, num_samples - index), seed, exact_check, profile,
+               cache_path, prune)
+              for index in range(start, num_samples, chunk_size))
+    return run_shards(sample_shard, shards, pool, max_in_flight)
+
+
+def save_checkpoint(path, checkpoint):
+    '''Atomically write the sweep position to path (as JSON). Each write goes through
+    its own temporary file, so processes writing the same path (such as two workers
+    that burned the same shard) do not get in each other's way.'''
+    directory, name = os.path.split(path)
+    descriptor, temp_path = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory or '.')
+    try:
+        # mkstemp makes the file private, but other hosts' workers may need to read it
+        os.fchmod(descriptor, 0o644)
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(checkpoint, file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def load_checkpoint(path, alg, sample=None):
+    '''Read the sweep position saved by save_checkpoint. sample is [family, trees per
+    order, seed] for a sampling sweep.'''
+    with open(path, 'r') as file:
+        checkpoint = json.load(file)
+
+    if checkpoint['alg'] != alg:
+        raise ValueError("Checkpoint {} is for algorithm {}, not {}".format(path, checkpoint['alg'], alg))
+    if checkpoint.get('sample') != sample:
+        raise ValueError("Checkpoint {} is for sampling {}, not {}".format(path, checkpoint.get('sample'), sample))
+    return checkpoint
+
+
+def print_counterexample(n, length, nodes, edges, exact=None, alg=None):
+    print('n={0:2d} | b(G)<={1:2d} | ceil(sqrt(n))={2:2d}'.format(n,
+                                                                  length,
+                                                                  math.ceil(math.sqrt(n)))
+          + ('' if alg is None else ' | ' + alg), flush=True)
+    if exact is not None:
+        print("Exact b(G):", exact, "(heuristic failure)" if exact <= math.ceil(math.sqrt(n)) else "(counterexample)")
+    print("Nodes:", nodes)
+    print("Edges:", edges)
+    print()
+
+
+def print_invalid(n, burning_sequence, uncovered, nodes, edges, alg=None):
+    print('n={0:2d} | invalid sequence {1} | never burned: {2}'.format(n, burning_sequence, uncovered)
+          + ('' if alg is None else ' | ' + alg), flush=True)
+    print("Nodes:", nodes)
+    print("Edges:", edges)
+    print()
+
+
+def print_order_header(n):
+    print("\n" + "*"*20)
+    print("Order:", n, flush=True)
+    print("*"*20)
+
+
+def print_stats(num_trees, stats):
+    '''Print the per-algorithm totals (see burn_trees) over num_trees trees side by side.
+    Derived sequences are never over the bound (those trees go on to the algorithms),
+    so they get a line of their own instead.'''
+    if 'derived' in stats:
+        _, _, total_length, seconds, derived = stats['derived']
+        print("Derived sequences for {} trees (mean length {:.3f}, {:.2f} seconds), "
+              "handed {} to the algorithms".format(derived, total_length / max(derived, 1), seconds,
+                                                   num_trees - derived))
+    print('{:7s} | {:>10s} | {:>8s} | {:>11s} | {:>9s} | {:>9s}'.format('alg', 'over bound', 'invalid', 'mean length',
+                                                                     'seconds', 'skipped'))
+    for alg, (over, invalid, total_length, seconds, burned) in stats.items():
+        if alg == 'derived':
+            continue
+        print('{:7s} | {:10d} | {:8d} | {:11.3f} | {:9.2f} | {:9d}'.format(alg, over, invalid,
+                                                                           total_length / max(burned, 1), seconds,
+                                                                           num_trees - burned))
+    print(flush=True)
+
+
+def main(argv=None):
+    '''Run the sweep given by the command line arguments (argv, default sys.argv[1:]).'''
+    args = parser.parse_args(argv)
+    try:
+        algs = parse_algs(args.alg)
+    except ValueError as error:
+        parser.error(str(error))
+    alg = ','.join(algs)
+    if args.sample is not None and args.store is not None:
+        # The store keys trees by their level sequence, which sampled trees do not have
+        parser.error("--store cannot be used with --sample")
+    if args.sample is not None and args.incremental is not None:
+        # Summaries are only any use when every tree of the order before is in them
+        parser.error("--incremental cannot be used with --sample")
+    if args.coordinate is not None and args.work is not None:
+        parser.error("--coordinate and --work cannot be used together")
+    if (args.coordinate or args.work) and (args.sample is not None or args.store is not None or args.profile
+                                           or args.incremental is not None):
+        parser.error("--sample, --store, --profile and --incremental cannot be used with a shared sweep")
+    sample = None if args.sample is None else [args.family, args.sample, args.seed]
+    orders = None if args.orders is None else sorted(set(args.orders))
+
+    print("Using algorithm", alg)
+    if sample is not None:
+        print("Sampling {} {} trees of each order (seed {})".format(args.sample, args.family, args.seed))
+
+    if args.work is not None:
+        from .shared_sweep import work
+
+        print("Working on the sweep in", args.work, flush=True)
+        if args.workers > 1:
+            with Pool(args.workers) as pool:
+                burned = sum(pool.starmap(work, [(args.work, algs, args.cache, args.lease)] * args.workers))
+        else:
+            burned = work(args.work, algs, args.cache, args.lease)
+        print("Burned {} shards".format(burned))
+        return
+
+    if args.coordinate is not None:
+        from .shared_sweep import coordinate
+
+        if orders is None:
+            orders = itertools.count(args.min_order)
+        orders = itertools.takewhile(lambda m: args.max_order is None or m <= args.max_order, orders)
+        sweep = {'alg': algs, 'chunk_size': args.chunk_size, 'prune': args.prune, 'exact_check': args.exact_check}
+        print("Coordinating the sweep in", args.coordinate, flush=True)
+        for n, result in coordinate(args.coordinate, sweep, orders, args.lease):
+            print_order_header(n)
+            for counterexample in result['counterexamples']:
+                print_counterexample(*counterexample)
+            for sequence in result['invalid']:
+                print_invalid(*sequence)
+            print("There are {} trees of order {}".format(result['trees'], n))
+            if len(algs) > 1 or args.prune:
+                print_stats(result['trees'], result['stats'])
+        return
+
+    pool = Pool(args.workers) if args.workers > 1 else None
+
+    # The checkpoint records the order being swept, how many of its trees are done
+    # (in generation order), and all counterexamples and invalid sequences found so far
+    checkpoint_path = args.checkpoint or 'checkpoint_{}{}.json'.format(alg, '' if sample is None
+                                                                        else '_' + args.family)
+    if args.resume:
+        checkpoint = load_checkpoint(checkpoint_path, alg, sample)
+        checkpoint.setdefault('invalid', [])
+        print("Resuming at order {}, tree {} ({} counterexamples so far)".format(checkpoint['order'],
+                                                                               checkpoint['index'],
+                                                                               len(checkpoint['counterexamples'])))
+    else:
+        checkpoint = {'alg': alg, 'order': args.min_order if orders is None else orders[0], 'index': 0,
+                      'total_trees': 0, 'counterexamples': [], 'invalid': [], 'sample': sample}
+    last_saved = time.monotonic()
+
+    # Results and summaries are flushed to their stores before every checkpoint, so the
+    # stores always have every tree the checkpoint counts as done
+    store = ResultStore(args.store) if args.store is not None else None
+    summaries = SummaryStore(args.incremental) if args.incremental is not None else None
+
+    # The order is None once the last of --orders is done
+    n = checkpoint['order']
+    while n is not None and (args.max_order is None or n <= args.max_order):
+        print_order_header(n)
+
+        # Burn all non-isomorphic trees of order n, or the random sample of them
+        num_trees = checkpoint['index']
+        profiles = {name: Collector() for name in algs} if args.profile else None
+        # Totals for this run only: trees burned before a resume are not counted
+        stats = {}
+        burned = 0
+        if sample is None:
+            results = sweep_order(n, algs, pool, args.chunk_size, 2 * args.workers, start=num_trees,
+                                  exact_check=args.exact_check, profile=args.profile,
+                                  keep_records=store is not None, cache_path=args.cache, prune=args.prune,
+                                  summary_path=args.incremental)
+        else:
+            results = sample_order(n, algs, args.family, args.sample, args.seed, pool, args.chunk_size,
+                                   2 * args.workers, start=num_trees, exact_check=args.exact_check,
+                                   profile=args.profile, cache_path=args.cache, prune=args.prune)
+        for result in results:
+            if profiles is not None:
+                for name, collector in result['profiles'].items():
+                    profiles[name].merge(collector)
+            if store is not None:
+                store.add(result['records'])
+            if summaries is not None:
+                summaries.add(result['summaries'])
+            for name, alg_stats in result['stats'].items():
+                stats[name] = [total + value for total, value in zip(stats.get(name, [0, 0, 0, 0.0, 0]), alg_stats)]
+            burned += result['trees']
+            for counterexample in result['counterexamples']:
+                print_counterexample(*counterexample)
+            for sequence in result['invalid']:
+                print_invalid(*sequence)
+            num_trees += result['trees']
+
+            checkpoint['index'] = num_trees
+            checkpoint['total_trees'] += result['trees']
+            checkpoint['counterexamples'].extend(result['counterexamples'])
+            checkpoint['invalid'].extend(result['invalid'])
+            if time.monotonic() - last_saved >= args.checkpoint_interval:
+                if store is not None:
+                    store.flush()
+                if summaries is not None:
+                    summaries.flush()
+                save_checkpoint(checkpoint_path, checkpoint)
+                last_saved = time.monotonic()
+
+        if sample is None:
+            print("There are {} trees of order {}".format(num_trees, n))
+        else:
+            print("Burned {} random {} trees of order {}".format(num_trees, args.family, n))
+        if checkpoint['invalid']:
+            print("{} invalid burning sequences so far".format(len(checkpoint['invalid'])))
+        if len(algs) > 1 or args.profile or args.prune or summaries is not None:
+            print_stats(burned, stats)
+        if profiles is not None:
+            for name, profile in profiles.items():
+                print("Profile of", name)
+                print(profile.report(), flush=True)
+        n = n + 1 if orders is None else next((m for m in orders if m > n), None)
+
+        checkpoint['order'] = n
+        checkpoint['index'] = 0
+        if store is not None:
+            store.flush()
+        if summaries is not None:
+            summaries.flush()
+        save_checkpoint(checkpoint_path, checkpoint)
+        last_saved = time.monotonic()
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+    if store is not None:
+        store.close()
+    if summaries is not None:
+        summaries.close()
+
+
+if __name__ == '__main__':
+    main()
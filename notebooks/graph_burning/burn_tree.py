@@ -0,0 +1,580 @@
+import math
+import numpy as np
+
+from .compact_tree import CompactTree
+from .tree_distance import TreeDistances
+from .burning_state import BurningState
+from .tree_metrics import centres, eccentricities
+from .instrumentation import NULL_COLLECTOR
+from .exact_burning import burning_number
+
+
+def shortest_path_lengths(graph):
+    '''Returns a dictionary of dictionaries. dict[i][j] contains the distance
+    between vertices i and j. This takes O(n^2) memory - for trees, prefer TreeDistances.'''
+    import networkx as nx
+
+    dist_gen = nx.shortest_path_length(graph)
+
+    node_distances = {}
+    for node, distance_dict in dist_gen:
+        node_distances[node] = distance_dict
+        
+    return node_distances
+
+
+def find_farthest(distances, marked, root):
+    '''Find the unmarked vertex farthest from the root (assumes root is  vertex 0)'''
+    farthest = None
+    farthest_dist = -1
+    for node, dist in distances.bfs(root):
+        if node not in marked and dist > farthest_dist:
+            farthest = node
+            farthest_dist = dist
+    return farthest
+
+
+def get_i_ancestor(node_distances, source, root, i):
+    '''Return the ith ancestor of the source node.
+    In a tree, the ith ancestor of any node is the node that is at distance
+    i from it and is closer to the root.'''
+    if i == 0:
+        return source
+    
+    if isinstance(node_distances, TreeDistances):
+        return node_distances.walk(source, root, i)
+    
+    for node, dist in node_distances[source].items():
+        if dist == i and node_distances[root][node] == node_distances[root][source] - i:
+            return node
+        
+    raise RuntimeError("No ancestor found")
+    
+
+def burn_tree(tree, root=0, collector=None, distances=None):
+    '''Implementation for tree burning algorithm (arbitrary root)
+    Input:  a tree to burn (networkx graph or CompactTree), optionally an
+            instrumentation.Collector to report timings and counters to, and
+            optionally the tree's TreeDistances if already built
+    Output: a burning sequence for the tree
+    '''
+    if collector is None:
+        collector = NULL_COLLECTOR
+    collector.start_burn()
+    
+    centers = []
+    num_marked = []
+    marked = set()
+    
+    with collector.phase('setup'):
+        if distances is None:
+            distances = TreeDistances(tree)
+    
+    i = 0
+    while len(marked) < tree.order():
+        # Find the unmarked vertex farthest from the root
+        with collector.phase('farthest'):
+            farthest = find_farthest(distances, marked, root)
+        
+        with collector.phase('ancestor'):
+            if distances.dist(root, farthest) >= i:
+                # Add the ith ancestor of the farthest node to centers
+                i_ancestor = get_i_ancestor(distances, farthest, root, i)
+                centers.insert(root, i_ancestor)
+            elif root not in centers:
+                # If there is no ith ancestor, add the root
+                i_ancestor = root
+                centers.insert(0, root)
+        
+        # Add all vertices within distance i of the i_ancestor to marked
+        with collector.phase('mark'):
+            marked_it = 0
+            for node in distances.ball(i_ancestor, i):
+                if node not in marked:
+                    marked_it += 1
+                    marked.add(node)
+        
+        num_marked.append(marked_it)
+        collector.count('vertices marked', marked_it)
+        collector.next_round()
+        
+        i += 1
+    
+    return centers, num_marked
+
+
+def get_central_node(eccentricities, marked):
+    '''Return an umarked node of minimum eccentricity.'''
+    cnode = None
+    min_eccen = 34324312432
+
+    for node, eccen in eccentricities.items():
+        if node not in marked:
+            if cnode is None or eccen < min_eccen:
+                cnode = node
+                min_eccen = eccen
+
+    return cnode
+
+
+def get_eccentricities(distances, marked):
+    '''Return a dictionary (vertex -> eccentricity) wrt only unmarked nodes.'''
+    # We only want to calculate eccentricity based on unmarked nodes
+    unmarked = sorted(node for node in distances.nodes if node not in marked)
+    within = np.zeros(distances.order(), dtype=bool)
+    within[[distances.index[node] for node in unmarked]] = True
+    eccentricity = eccentricities(distances, within)
+
+    return {node: int(eccentricity[distances.index[node]]) for node in unmarked}
+
+
+def burn_tree_using_centers(tree, update_root=True, collector=None, distances=None):
+    '''Implementation for tree burning algorithm. Optionally choose to update the root 
+    each loop iteration to be a vertex of minimum eccentricity (the smallest such vertex,
+    as the original implementation, which numbered the vertices 0..n-1, took).
+
+    Input:  a tree to burn (networkx graph or CompactTree), optionally an
+            instrumentation.Collector to report timings and counters to, and
+            optionally the tree's TreeDistances if already built
+    Output: a burning sequence for the tree
+    '''
+    if collector is None:
+        collector = NULL_COLLECTOR
+    collector.start_burn()
+    
+    centers = []
+    marked = set()
+
+    with collector.phase('setup'):
+        if distances is None:
+            distances = TreeDistances(tree)
+        unmarked = np.ones(distances.order(), dtype=bool)
+
+    i = 0
+    root = 0
+    while len(marked) < tree.order():
+        if update_root:
+            # An unmarked vertex of minimum eccentricity wrt the unmarked vertices, the
+            # smallest if there are several (whatever order the graph has them in)
+            with collector.phase('eccentricities'):
+                root = min(distances.nodes[v] for v in centres(distances, within=unmarked))
+            collector.count('distance queries', 3 * tree.order())
+
+        # Find the unmarked vertex farthest from the root
+        with collector.phase('farthest'):
+            farthest = find_farthest(distances, marked, root)
+
+        with collector.phase('ancestor'):
+            if distances.dist(root, farthest) >= i:
+                # Add the ith ancestor of the farthest node to centers
+                i_ancestor = get_i_ancestor(distances, farthest, root, i)
+                centers.insert(0, i_ancestor)
+            elif root not in centers:
+                # If there is no ith ancestor, add the root
+                i_ancestor = root  # Update this so the marking of vertices works later
+                centers.insert(0, root)
+        
+        # Add all vertices within distance i of the i_ancestor to marked
+        with collector.phase('mark'):
+            num_marked = len(marked)
+            ball = distances.ball(i_ancestor, i)
+            marked.update(ball)
+            unmarked[[distances.index[node] for node in ball]] = False
+        collector.count('vertices marked', len(marked) - num_marked)
+        collector.next_round()
+        
+        i += 1
+    
+    return centers
+
+def get_leaves(tree, root=None):
+    '''Return a list containing the leaves of a tree.'''
+    import networkx as nx
+
+    if tree.order() == 1:
+        return [node for node, nodedata in tree.nodes.items()]
+    
+    degrees = nx.classes.function.degree(tree)
+    leaves = []
+
+    for node, deg in degrees:
+        if deg == 1 and node != root:
+            leaves.append(node)
+    
+    return leaves
+
+
+def get_neighbourhood(tree, source, radius, node_distances=None):
+    '''Return all vertices within radius of the source vertex. node_distances is either
+    a TreeDistances for the tree (or a tree containing it) or an all-pairs dictionary.'''
+    if node_distances is None:
+        node_distances = TreeDistances(tree)
+    
+    if isinstance(node_distances, TreeDistances):
+        within = None if isinstance(tree, CompactTree) else tree
+        return node_distances.ball(source, radius, within=within)
+       
+    neighbourhood = set()
+    for node, dist in node_distances[source].items():
+        if dist <= radius:
+            neighbourhood.add(node)
+    
+    return neighbourhood
+
+
+def is_bridge(tree, node):
+    '''Returns True if removing the given node will disconnect the tree.'''
+    import networkx as nx
+
+    if not nx.algorithms.tree.recognition.is_tree(tree):
+        raise nx.algorithms.tree.coding.NotATree()
+    
+    if nx.classes.function.degree(tree, node) <= 1:
+        return False
+    
+    return True
+
+
+def remove_nhood(tree, nhood, dry_run=False):
+    '''Removes as many nodes as possible from the tree while keeping the tree connected.
+    Returns the reduced tree, or with dry_run just the number of nodes that would be removed
+    (without copying the tree).'''
+    nhood = set(nhood)
+    degree = {}
+    removed = set()
+    
+    # Peel off removable nodes (leaves of what is left) with a work queue
+    queue = [node for node in nhood if tree.degree(node) <= 1]
+    for node in queue:
+        removed.add(node)
+        for neighbour in tree.adj[node]:
+            if neighbour in removed:
+                continue
+            degree[neighbour] = degree.get(neighbour, tree.degree(neighbour)) - 1
+            
+            # The neighbour has just become a leaf, so it can go too
+            if degree[neighbour] == 1 and neighbour in nhood:
+                queue.append(neighbour)
+    
+    if dry_run:
+        return len(removed)
+    
+    tree = tree.copy()
+    tree.remove_nodes_from(removed)
+    return tree
+    
+
+def trial_order(state, leaves, radius, candidates=None):
+    '''Return the names of the vertices within radius of the leaf indices in leaves, in
+    the order the heuristics have always tried them: a set built up ball by ball, leaf
+    by leaf, and with candidates (indices), a second set of just those built up in the
+    order of the first. Sets of small integers iterate in an order that depends on how
+    they were built, so only building them the same way gives the same order.'''
+    nodes = state.distances.nodes
+    near = set()
+    seen = np.zeros(len(state.alive), dtype=bool)
+    for ball in state.balls(leaves, radius):
+        # Each ball was a set of names, added to near element by element; only the order
+        # of the ones new to near matters, and only if there are several
+        new = ball[~seen[ball]]
+        if len(new) == 0:
+            continue
+        seen[new] = True
+        if len(new) == 1:
+            near.add(nodes[new[0]])
+            continue
+        fresh = set(nodes[v] for v in new.tolist())
+        near.update([node for node in set([nodes[v] for v in ball.tolist()]) if node in fresh])
+    if candidates is None:
+        return list(near)
+    
+    keep = set(nodes[v] for v in candidates.tolist())
+    kept = set()
+    for node in near:
+        if node in keep:
+            kept.add(node)
+    return list(kept)
+
+
+def best_candidate(state, candidates, radius, leaves=None, order=None):
+    '''Score the radius balls around all candidate vertex indices at once and return the
+    best candidate, or None if no ball would remove anything. With leaves (a boolean mask
+    of leaves), the ball covering the most leaves wins, and ties go to the one removing
+    the most vertices; without it, the one removing the most vertices wins. Any ties
+    left go to the candidate that comes first in order(), a function returning the
+    candidates' names (see trial_order), only called when there is a tie; without it,
+    to the candidate that comes first.'''
+    if len(candidates) == 0:
+        return None
+    
+    num_leaves, num_removed = state.score_balls(candidates, radius, leaves if leaves is not None
+                                                else np.zeros(len(state.alive), dtype=bool))
+    score = num_leaves * (state.distances.order() + 1) + num_removed
+    best = int(np.argmax(score))
+    if score[best] == 0:
+        return None
+    
+    nodes = state.distances.nodes
+    tied = np.flatnonzero(score == score[best])
+    if len(tied) == 1 or order is None:
+        return nodes[candidates[best]]
+    rank = {name: r for r, name in enumerate(order())}
+    return min((nodes[v] for v in candidates[tied].tolist()), key=rank.__getitem__)
+
+
+def burn_most_leaves_reroot(tree, verbose=False, collector=None, distances=None):
+    '''Each iteration, root at a vertex of minimum eccentricity. Burns the vertex of height
+    i whose neighbourhood contains the most leaves.'''
+    if collector is None:
+        collector = NULL_COLLECTOR
+    collector.start_burn()
+    
+    with collector.phase('setup'):
+        state = BurningState(tree, distances)
+    distances = state.distances
+    
+    activators = []
+    marked = set()
+    bound = math.ceil(math.sqrt(state.order()))
+    
+    i = 0
+    while state.order() > 0:
+        if verbose:
+            print("\nTree size", state.order())
+            print("Nodes:", state.nodes())
+            print("Edges:", state.edges())
+        
+        # Calculate a new root each iteration
+        with collector.phase('centre'):
+            root = state.centre()
+        
+        with collector.phase('candidates'):
+            # Consider all vertices v of height at most i - which N_i[v] covers the most leaves?
+            leaves = state.leaf_mask(root=root)
+            
+            # Get all vertices within distance i of a leaf
+            leaf_indices = np.flatnonzero(leaves)
+            near_leaves = state.near(leaf_indices, i)
+            
+            # Remove those that are not >= sqrt(n) dist from the root
+            near_leaves2 = near_leaves[distances.distances_from(root, near_leaves) >= bound]
+        collector.count('distance queries', len(near_leaves))
+                
+        # If no nodes far enough from the root, consider all nodes
+        far_only = len(near_leaves2) > 0
+        if not far_only:
+            near_leaves2 = near_leaves
+        
+        # For all v we just got: take one with max leaves in its neighbourhood
+        with collector.phase('scoring'):
+            max_node = best_candidate(state, near_leaves2, i, leaves, lambda: trial_order(
+                state, leaf_indices, i, near_leaves2 if far_only else None))
+            max_nhood = get_neighbourhood(state, source=max_node, radius=i, node_distances=distances)
+        collector.count('candidates scored', len(near_leaves2))
+            
+        # Burn that vertex
+        if max_node in activators:
+            activators.remove(max_node)
+        activators.insert(0, max_node)
+        
+        with collector.phase('remove'):
+            num_removed = state.remove_nhood(max_nhood)
+        collector.count('vertices removed', num_removed)
+        collector.next_round()
+        
+        i += 1
+    
+    return activators
+
+
+def burn_most_leaves_fixed_root(tree, verbose=False, collector=None, distances=None):
+    '''Fix to root at the start to be a central vertex. Choose the vertex to burn based on 
+    the number of leaves covered. If no vertices farther than sqrt(n) distance from the root,
+    just burn the root.'''
+    if collector is None:
+        collector = NULL_COLLECTOR
+    collector.start_burn()
+    
+    with collector.phase('setup'):
+        state = BurningState(tree, distances)
+    distances = state.distances
+    
+    activators = []
+    marked = set()
+    bound = math.ceil(math.sqrt(state.order()))
+    
+    # First, root at a central vertex (min eccentricity)
+    with collector.phase('centre'):
+        root = state.centre()
+    
+    i = 0
+    while state.order() > 0:
+        if verbose:
+            print("\nTree size", state.order())
+            print("Nodes:", state.nodes())
+            print("Edges:", state.edges())
+        
+        with collector.phase('candidates'):
+            # Consider all vertices v of height at most i - which N_i[v] covers the most leaves?
+            leaves = state.leaf_mask(root=root)
+            
+            # Get all vertices within distance i of a leaf
+            leaf_indices = np.flatnonzero(leaves)
+            near_leaves = state.near(leaf_indices, i)
+            
+            # Remove those that are not >= sqrt(n) dist from the root
+            # (once the root itself has been removed, nothing counts as far enough)
+            near_leaves2 = near_leaves[:0]
+            if root in state:
+                near_leaves2 = near_leaves[distances.distances_from(root, near_leaves) >= bound]
+                collector.count('distance queries', len(near_leaves))
+                
+        # TODO: move this check the start of the loop to fix bug
+        # If no nodes far enough from the root, just burn the root
+        if len(near_leaves2) == 0:
+            # Pad the burning sequence to make it valid-ish
+            num_to_fill = bound - len(activators) - 1 
+            activators = [root] + ['x' for i in range(num_to_fill)] + activators
+            break
+        
+        # For all v we just got: take one with max leaves in its neighbourhood
+        with collector.phase('scoring'):
+            max_node = best_candidate(state, near_leaves2, i, leaves,
+                                      lambda: trial_order(state, leaf_indices, i, near_leaves2))
+            max_nhood = get_neighbourhood(state, source=max_node, radius=i, node_distances=distances)
+        collector.count('candidates scored', len(near_leaves2))
+            
+        # Burn that vertex
+        if max_node in activators:
+            activators.remove(max_node)
+        activators.insert(0, max_node)
+        
+        with collector.phase('remove'):
+            num_removed = state.remove_nhood(max_nhood)
+        collector.count('vertices removed', num_removed)
+        collector.next_round()
+        
+        i += 1
+    
+    return activators
+
+
+def burn_most_removed(tree, verbose=False, collector=None, distances=None):
+    '''Root at a central vertex each iteration. Choose the node to burn based on whose neighbourhood
+    covers the most vertices that can be removed, without disconnecting the tree.'''
+    if collector is None:
+        collector = NULL_COLLECTOR
+    collector.start_burn()
+    
+    with collector.phase('setup'):
+        state = BurningState(tree, distances)
+    distances = state.distances
+    
+    activators = []
+    marked = set()
+    bound = math.ceil(math.sqrt(state.order()))
+    
+    i = 0
+    while state.order() > 0:
+        if verbose:
+            print("\nTree size", state.order())
+            print("Nodes:", state.nodes())
+            print("Edges:", state.edges())
+        
+        # Remove any marked vertices that are now removeable
+        with collector.phase('remove'):
+            for node in marked:
+                if node in state and not state.is_bridge(node):
+                    state.remove(node)
+                    collector.count('vertices removed')
+        
+        # First, root at a central vertex (min eccentricity)
+        with collector.phase('centre'):
+            root = state.centre()
+        
+        with collector.phase('candidates'):
+            # Consider all vertices v of height at most i - which N_i[v] covers the most leaves?
+            leaves = state.leaf_mask(root=root)
+            
+            # Get all vertices within distance i of a leaf
+            leaf_indices = np.flatnonzero(leaves)
+            near_leaves = state.near(leaf_indices, i)
+            
+            # Remove those that are not >= sqrt(n) dist from the root
+            near_leaves2 = near_leaves[distances.distances_from(root, near_leaves) >= bound]
+        collector.count('distance queries', len(near_leaves))
+                
+        # If no nodes far enough from the root, just burn the root
+        if len(near_leaves2) == 0:
+            # Pad the burning sequence to make it valid-ish
+            num_to_fill = bound - len(activators) - 1 
+            activators = [root] + ['x' for i in range(num_to_fill)] + activators
+            break
+        
+        # From all these vertices, we will burn the one which covers most removable vertices
+        with collector.phase('scoring'):
+            max_node = best_candidate(state, near_leaves2, i,
+                                      order=lambda: trial_order(state, leaf_indices, i, near_leaves2))
+            max_nhood = get_neighbourhood(state, source=max_node, radius=i, node_distances=distances)
+        collector.count('candidates scored', len(near_leaves2))
+            
+        # Burn that vertex
+        if max_node in activators:
+            activators = [i if i != max_node else 'x' for i in activators]
+        activators.insert(0, max_node)
+        
+        with collector.phase('remove'):
+            num_removed = state.remove_nhood(max_nhood)
+        collector.count('vertices removed', num_removed)
+        
+        # Mark all vertices in the neighbourhood that could not be removed
+        for node in max_nhood:
+            if node in state:
+                marked.add(node)
+        collector.next_round()
+        
+        i += 1
+    
+    return activators
+
+
+# The heuristics burn runs, as named by --alg (and run by --alg all)
+HEURISTICS = ['frl', 'rrl', 'md', 'rrr']
+
+
+def parse_algs(spec):
+    '''Return the list of algorithms named by --alg: one name, a comma separated list, or all.'''
+    if spec == 'all':
+        return list(HEURISTICS)
+
+    algs = spec.split(',')
+    for alg in algs:
+        if alg not in HEURISTICS + ['exact']:
+            raise ValueError("Unknown algorithm {} (expected one of {}, exact or all)".format(alg,
+                                                                                          ', '.join(HEURISTICS)))
+    return algs
+
+
+def burn(tree, alg, collector=NULL_COLLECTOR, distances=None):
+    '''Return the burning sequence found for the tree by the given algorithm, reporting
+    timings and counters to the collector. distances (a TreeDistances for the tree) can
+    be passed in to share it between algorithms.'''
+    if alg == 'frl':
+        # Fixed Root, Most Leaves
+        return burn_most_leaves_fixed_root(tree, collector=collector, distances=distances)
+    elif alg == 'rrl':
+        # Re-Root, Most Leaves
+        return burn_most_leaves_reroot(tree, collector=collector, distances=distances)
+    elif alg == 'md':
+        # Max Depth
+        burning_sequence, marked = burn_tree(tree, collector=collector, distances=distances)
+        return burning_sequence
+    elif alg == 'exact':
+        # Optimal sequence by branch and bound (small trees only)
+        collector.start_burn()
+        with collector.phase('exact search'):
+            k, burning_sequence = burning_number(tree, distances)
+        return burning_sequence
+    else:
+        # Re-Root, Most Removable Nodes
+        return burn_most_removed(tree, collector=collector, distances=distances)
@@ -0,0 +1,94 @@
+import json
+import sqlite3
+from collections import OrderedDict
+
+from .canonical import canonical_form
+from .compact_tree import CompactTree
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS burns (
+    alg TEXT NOT NULL,
+    tree BLOB NOT NULL,
+    sequence TEXT NOT NULL,
+    PRIMARY KEY (alg, tree)
+) WITHOUT ROWID;
+'''
+
+
+class BurningCache:
+    '''Cache of burning sequences keyed by algorithm and canonical tree form, so that a
+    tree isomorphic to one seen before is not burned again.
+
+    Sequences are kept as positions in the canonical vertex order (see
+    canonical.canonical_form) and translated to the vertices of whichever tree asks.
+    A hit therefore returns the sequence found for the first tree of its class, mapped
+    through an isomorphism: just as long and just as valid, though ties may have been
+    broken differently than a fresh run on this labelling would.
+
+    The maxsize most recently used entries are kept in memory. If path is given, every
+    entry is also written to an SQLite file there, which is read on a memory miss.'''
+
+    def __init__(self, maxsize=4096, path=None):
+        self.maxsize = maxsize
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = None
+        if path is not None:
+            self.connection = sqlite3.connect(path, timeout=60)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.executescript(SCHEMA)
+
+    def get(self, alg, code):
+        '''Return the cached sequence (in canonical positions) or None.'''
+        key = (alg, code)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        if self.connection is not None:
+            row = self.connection.execute('SELECT sequence FROM burns WHERE alg = ? AND tree = ?',
+                                          (alg, code)).fetchone()
+            if row is not None:
+                sequence = json.loads(row[0])
+                self._remember(key, sequence)
+                return sequence
+        return None
+
+    def put(self, alg, code, sequence):
+        '''Cache a sequence given in canonical positions.'''
+        self._remember((alg, code), sequence)
+        if self.connection is not None:
+            with self.connection:
+                self.connection.execute('INSERT OR REPLACE INTO burns VALUES (?, ?, ?)',
+                                        (alg, code, json.dumps(sequence)))
+
+    def _remember(self, key, sequence):
+        self.memory[key] = sequence
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def burn(self, tree, alg, function):
+        '''Return function(tree), a burning sequence of the tree (networkx graph or
+        CompactTree), from the cache under the name alg if possible.'''
+        compact = tree if isinstance(tree, CompactTree) else CompactTree.from_networkx(tree)
+        code, vertices = canonical_form(compact)
+        nodes = compact.nodes()
+
+        cached = self.get(alg, code)
+        if cached is not None:
+            self.hits += 1
+            return [source if source == 'x' else nodes[vertices[source]] for source in cached]
+
+        self.misses += 1
+        sequence = function(tree)
+        position = {nodes[v]: i for i, v in enumerate(vertices)}
+        self.put(alg, code, [source if source == 'x' else position[source] for source in sequence])
+        return sequence
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
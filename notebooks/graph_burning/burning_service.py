@@ -0,0 +1,266 @@
+import io
+import os
+import sys
+import stat
+import signal
+import json
+import time
+import socket
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .burn_tree import burn, parse_algs
+from .compact_tree import CompactTree
+from .graph_utils import load_tree
+from .structured_trees import burn_structured
+from .tree_families import path
+from .verify_burning import verify_burning_sequence
+
+
+# Requests and responses are JSON objects, one per line.
+#
+# A request holds an "id" (anything, echoed back), "alg" (as for burn_all_trees.py
+# --alg: one algorithm, a comma separated list, or all) and the tree as one of:
+#   "edges": [[u, v], ...], with any JSON vertex names (and "nodes": [...] for a
+#            tree on a single vertex);
+#   "mat":   the text of a tree file, a dense adjacency matrix as in the trees
+#            directory or an edge list (see graph_utils.load_tree);
+#   "path":  the path of a tree file readable by the service.
+#
+# Each response holds the request's "id", the order "n" of the tree, its "shape" (see
+# structured_trees.classify, null for other trees) and "results", mapping each
+# algorithm to its "sequence", "length", "valid" (whether the sequence burns the tree)
+# and "seconds". Paths, stars, and the spiders and caterpillars whose sequences built
+# by structured_trees are certified optimal, get that optimal sequence for every
+# algorithm, without running the heuristics. A request that cannot be served gets a
+# response with its "id" and an "error" message instead. Responses are sent as the
+# trees finish, so they need not come back in the order the requests were sent.
+
+
+parser = argparse.ArgumentParser(description='Burn batches of trees sent as JSON lines, on a pool of worker processes')
+parser.add_argument('--socket',
+                    type=str,
+                    default=None,
+                    help='serve on this Unix socket (default: read requests from stdin, answer on stdout)')
+parser.add_argument('--workers',
+                    type=int,
+                    default=4,
+                    help='number of worker processes (default 4)')
+parser.add_argument('--max-pending',
+                    type=int,
+                    default=None,
+                    help='stop reading requests from a client while this many of its trees are unfinished '
+                         '(default twice the number of workers)')
+
+
+def request_tree(request):
+    '''Return the tree described by a request as a CompactTree on vertices 0..n-1 (the
+    heuristics start from vertex 0), and the names of its vertices.'''
+    if 'edges' in request:
+        import networkx as nx
+
+        graph = nx.Graph()
+        graph.add_nodes_from(request.get('nodes', []))
+        graph.add_edges_from(tuple(edge) for edge in request['edges'])
+        if not nx.is_tree(graph):
+            raise ValueError("The edges do not form a tree")
+        tree = CompactTree.from_networkx(graph)
+    elif 'mat' in request:
+        tree = load_tree(io.StringIO(request['mat']))
+    elif 'path' in request:
+        tree = load_tree(request['path'])
+    else:
+        raise ValueError("A request needs edges, mat or path")
+    return CompactTree(tree.indptr, tree.indices, parent=tree.parent), list(tree.nodes())
+
+
+def burn_request(request):
+    '''Serve one request (a dict) and return the response (a dict). Runs in a worker.'''
+    try:
+        algs = parse_algs(request['alg'])
+        tree, names = request_tree(request)
+
+        started = time.perf_counter()
+        shape, optimal = burn_structured(tree)
+        closed_seconds = time.perf_counter() - started
+
+        results = {}
+        for alg in algs:
+            if optimal is not None:
+                burning_sequence, seconds = optimal, closed_seconds
+            else:
+                started = time.perf_counter()
+                burning_sequence = burn(tree, alg)
+                seconds = time.perf_counter() - started
+            results[alg] = {'sequence': [v if v == 'x' else names[v] for v in burning_sequence],
+                            'length': len(burning_sequence),
+                            'valid': not verify_burning_sequence(tree, burning_sequence),
+                            'seconds': seconds}
+        return {'id': request.get('id'), 'n': tree.order(), 'shape': shape, 'results': results}
+    except Exception as error:
+        return {'id': request.get('id'), 'error': '{}: {}'.format(type(error).__name__, error)}
+
+
+def warm_up():
+    '''Run every heuristic once on a small tree, so that a worker's first real tree does
+    not pay for imports and first-call setup.'''
+    burn_request({'alg': 'all', 'edges': path(8).edges()})
+
+
+def encode(response):
+    return (json.dumps(response, default=int) + '\n').encode()
+
+
+async def serve(read_line, write, pool, max_pending):
+    '''Serve the requests from one client until it has no more. read_line is a coroutine
+    returning the next line (b'' at the end) and write one sending bytes back.
+
+    A request is only read once fewer than max_pending of the client's trees are
+    unfinished, so a client that sends faster than the pool burns ends up blocked on
+    a full pipe or socket instead of queueing without bound.'''
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max_pending)
+    write_lock = asyncio.Lock()
+    tasks = set()
+
+    async def respond(future):
+        try:
+            response = await future
+        finally:
+            slots.release()
+        async with write_lock:
+            await write(encode(response))
+
+    while True:
+        await slots.acquire()
+        line = await read_line()
+        if not line:
+            slots.release()
+            break
+        if not line.strip():
+            slots.release()
+            continue
+
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object")
+        except ValueError as error:
+            slots.release()
+            async with write_lock:
+                await write(encode({'id': None, 'error': 'Bad request: {}'.format(error)}))
+            continue
+
+        task = asyncio.ensure_future(respond(loop.run_in_executor(pool, burn_request, request)))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def serve_stdio(pool, max_pending):
+    '''Serve requests from stdin, answering on stdout, until stdin is closed.'''
+    loop = asyncio.get_running_loop()
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+
+    # Reading in a thread works whatever stdin is (pipe, file or terminal)
+    async def read_line():
+        return await loop.run_in_executor(None, stdin.readline)
+
+    async def write(data):
+        stdout.write(data)
+        stdout.flush()
+
+    await serve(read_line, write, pool, max_pending)
+
+
+async def serve_socket(socket_path, pool, max_pending):
+    '''Serve every client that connects to the Unix socket at socket_path, until
+    interrupted or terminated.'''
+    async def client(reader, writer):
+        async def write(data):
+            writer.write(data)
+            await writer.drain()
+
+        try:
+            await serve(reader.readline, write, pool, max_pending)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # A socket file left behind by an earlier run would stop the server from binding
+    if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+        os.unlink(socket_path)
+
+    # Requests can hold large trees, so allow long lines
+    server = await asyncio.start_unix_server(client, socket_path, limit=1 << 30)
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop.set)
+    async with server:
+        await stop.wait()
+    os.unlink(socket_path)
+
+
+def tree_request(tree, alg, request_id=None):
+    '''Return the request (a dict) to burn a tree (networkx graph or CompactTree).'''
+    return {'id': request_id, 'alg': alg, 'nodes': list(tree.nodes()), 'edges': list(tree.edges())}
+
+
+def burn_remote(requests, socket_path):
+    '''Send requests (dicts, see tree_request) to the service listening on socket_path,
+    and yield the responses as they arrive. The requests are sent from a separate thread,
+    so the service can hold them back without blocking the responses.'''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+
+        def send():
+            with connection.makefile('wb') as file:
+                for request in requests:
+                    file.write(encode(request))
+            connection.shutdown(socket.SHUT_WR)
+
+        sender = threading.Thread(target=send, daemon=True)
+        sender.start()
+        with connection.makefile('rb') as file:
+            for line in file:
+                yield json.loads(line)
+        sender.join()
+
+
+def worker_context():
+    '''Return the multiprocessing context the workers are started in.
+
+    Workers are forked from a server process started before any client connects, so
+    they never hold a copy of a client's socket (which would keep it from closing),
+    and start quickly since the server has already imported this module. The module
+    is named by its spec, as __name__ is '__main__' when it is run with python -m (and
+    the server ignores a module it cannot import).'''
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__spec__.name])
+    return context
+
+
+def main(argv=None):
+    '''Start the service with the command line arguments argv (default sys.argv[1:]).'''
+    args = parser.parse_args(argv)
+    max_pending = args.max_pending or 2 * args.workers
+
+    with ProcessPoolExecutor(args.workers, mp_context=worker_context(), initializer=warm_up) as pool:
+        if args.socket is None:
+            asyncio.run(serve_stdio(pool, max_pending))
+        else:
+            print("Serving on", args.socket, file=sys.stderr, flush=True)
+            asyncio.run(serve_socket(args.socket, pool, max_pending))
+
+
+if __name__ == '__main__':
+    main()
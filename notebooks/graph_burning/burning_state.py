@@ -0,0 +1,270 @@
+import numpy as np
+
+from .compact_tree import gather_neighbours
+from .tree_distance import TreeDistances
+from .verify_burning import burn_radii
+
+
+class BurningState:
+    '''The residual tree of a burn, updated in place as neighbourhoods are removed.
+
+    Vertices are only ever removed while they are leaves, so the residual tree stays
+    connected and distances can always be answered by the TreeDistances of the
+    original tree. Degrees and the leaf set are updated in O(1) per removed vertex;
+    the diameter and centre are cached and only recomputed after a diameter endpoint
+    has been removed.'''
+
+    __slots__ = ('distances', 'alive', 'degree', 'num_alive', 'leaves', '_diameter', '_centre')
+
+    def __init__(self, tree, distances=None):
+        '''tree is a networkx graph or a CompactTree; distances may be passed in if
+        already built for it.'''
+        if distances is None:
+            distances = TreeDistances(tree)
+        self.distances = distances
+
+        n = distances.order()
+        self.alive = np.ones(n, dtype=bool)
+        self.degree = np.diff(distances.indptr)
+        self.num_alive = n
+        self.leaves = set(np.flatnonzero(self.degree <= 1).tolist())
+        self._diameter = None
+        self._centre = None
+
+    def copy(self):
+        '''Return an independent copy of this state (the distances are shared).'''
+        state = BurningState.__new__(BurningState)
+        state.distances = self.distances
+        state.alive = self.alive.copy()
+        state.degree = self.degree.copy()
+        state.num_alive = self.num_alive
+        state.leaves = set(self.leaves)
+        state._diameter = self._diameter
+        state._centre = self._centre
+        return state
+
+    def __contains__(self, node):
+        return self.alive[self.distances.index[node]]
+
+    def order(self):
+        '''Return the number of vertices left in the residual tree.'''
+        return self.num_alive
+
+    def nodes(self):
+        '''Return the vertices of the residual tree.'''
+        return [self.distances.nodes[v] for v in np.flatnonzero(self.alive)]
+
+    def edges(self):
+        '''Return the edges of the residual tree.'''
+        nodes = self.distances.nodes
+        parent = self.distances.parent
+        return [(nodes[parent[v]], nodes[v]) for v in np.flatnonzero(self.alive)
+                if parent[v] != v and self.alive[parent[v]]]
+
+    def get_leaves(self, root=None):
+        '''Return the leaves of the residual tree, in the order of the original graph.'''
+        if self.num_alive == 1:
+            return self.nodes()
+
+        root = None if root is None else self.distances.index[root]
+        return [self.distances.nodes[v] for v in sorted(self.leaves) if v != root]
+
+    def leaf_mask(self, root=None):
+        '''Return a boolean array over vertex indices marking get_leaves(root).'''
+        mask = np.zeros(len(self.alive), dtype=bool)
+        mask[list(self.leaves)] = True
+        if root is not None and self.num_alive > 1:
+            mask[self.distances.index[root]] = False
+        return mask
+
+    def is_bridge(self, node):
+        '''Returns True if removing the given node will disconnect the residual tree.'''
+        return self.degree[self.distances.index[node]] > 1
+
+    def _remove(self, v):
+        '''Remove the vertex with index v, which must be a leaf of the residual tree.'''
+        distances = self.distances
+        self.alive[v] = False
+        self.num_alive -= 1
+        self.leaves.discard(v)
+
+        for w in distances.indices[distances.indptr[v]:distances.indptr[v + 1]].tolist():
+            if self.alive[w]:
+                self.degree[w] -= 1
+                if self.degree[w] <= 1:
+                    self.leaves.add(w)
+
+        if self._diameter is not None and v in self._diameter[:2]:
+            self._diameter = None
+            self._centre = None
+
+    def remove(self, node):
+        '''Remove a leaf of the residual tree.'''
+        self._remove(self.distances.index[node])
+
+    def remove_nhood(self, nhood, dry_run=False):
+        '''Removes as many nodes of nhood as possible while keeping the tree connected.
+        Returns the number of nodes removed. With dry_run, only count them and leave the
+        state untouched.
+
+        Vertices are peeled off with a work queue of removable (degree <= 1) vertices,
+        so this takes O(|nhood| + degree of the removed vertices).'''
+        distances = self.distances
+        nhood = set(distances.index[node] for node in nhood)
+
+        # In a dry run, track degrees and removals locally instead of in the state
+        degree = {} if dry_run else None
+        removed = set() if dry_run else None
+
+        queue = [v for v in nhood if self.degree[v] <= 1]
+        num_removed = 0
+        for v in queue:
+            if dry_run:
+                removed.add(v)
+            else:
+                self._remove(v)
+            num_removed += 1
+
+            for w in distances.indices[distances.indptr[v]:distances.indptr[v + 1]].tolist():
+                if not self.alive[w] or (dry_run and w in removed):
+                    continue
+                if dry_run:
+                    degree[w] = degree.get(w, self.degree[w]) - 1
+                    w_degree = degree[w]
+                else:
+                    w_degree = self.degree[w]
+
+                # w has just become a leaf, so it can go too
+                if w_degree == 1 and w in nhood:
+                    queue.append(w)
+
+        return num_removed
+
+    def _farthest(self, s, alive):
+        '''Return the alive index farthest from index s, and its distance.'''
+        dist = self.distances._distances(s, alive)
+        i = int(np.argmax(dist))
+        return alive[i], int(dist[i])
+
+    def diameter(self):
+        '''Return the endpoints and length of a diameter of the residual tree.'''
+        if self._diameter is None:
+            alive = np.flatnonzero(self.alive)
+            a, _ = self._farthest(alive[0], alive)
+            b, length = self._farthest(a, alive)
+            self._diameter = (a, b, length)
+
+        a, b, length = self._diameter
+        return self.distances.nodes[a], self.distances.nodes[b], length
+
+    def centre(self):
+        '''Return a vertex of minimum eccentricity in the residual tree. If there are
+        two, return the one that comes first in the original graph.'''
+        if self._centre is None:
+            self.diameter()
+            a, b, length = self._diameter
+            centres = [self.distances._walk(a, b, length // 2),
+                       self.distances._walk(a, b, (length + 1) // 2)]
+            self._centre = min(centres)
+
+        return self.distances.nodes[self._centre]
+
+    def near(self, sources, radius):
+        '''Return the indices (in increasing order) of the vertices of the residual tree
+        within radius of any of the source indices, with one multi-source BFS.'''
+        distances = self.distances
+        left = burn_radii(distances.indptr, distances.indices, sources, np.full(len(sources), radius),
+                          alive=self.alive)
+        return np.flatnonzero(left >= 0)
+
+    def _ball_layers(self, centres, radius):
+        '''Breadth first search through the residual tree from every centre index at once,
+        each search kept separate. Returns a list of (owner, vertex) array pairs, one per
+        distance 0..radius + 1: vertex[j] is at that distance from centres[owner[j]].'''
+        distances = self.distances
+        owner = np.arange(len(centres))
+        vertex = np.asarray(centres)
+        previous = np.full(len(centres), -1)
+        layers = [(owner, vertex)]
+        for _ in range(radius + 1):
+            neighbours, counts = gather_neighbours(distances.indptr, distances.indices, vertex)
+            came_from = np.repeat(vertex, counts)
+
+            # In a tree, the only way back is the vertex we came from
+            keep = self.alive[neighbours] & (neighbours != np.repeat(previous, counts))
+            owner = np.repeat(owner, counts)[keep]
+            vertex, previous = neighbours[keep], came_from[keep]
+            layers.append((owner, vertex))
+        return layers
+
+    def balls(self, centres, radius, budget=1 << 22):
+        '''Yield, for each centre index in turn, the indices of the vertices within radius
+        of it in the residual tree as an array, in breadth first order. The balls are found
+        by one batched BFS per chunk of centres, as in score_balls.'''
+        centres = np.asarray(centres)
+        start = 0
+        chunk = 1
+        while start < len(centres):
+            stop = min(start + chunk, len(centres))
+            m = stop - start
+            layers = self._ball_layers(centres[start:stop], radius - 1)
+
+            # A stable sort by centre keeps each ball in breadth first order
+            owner = np.concatenate([layer[0] for layer in layers])
+            vertex = np.concatenate([layer[1] for layer in layers])
+            order = np.argsort(owner, kind='stable')
+            ends = np.cumsum(np.bincount(owner, minlength=m)).tolist()
+            yield from np.split(vertex[order], ends[:-1])
+
+            start = stop
+            chunk = max(1, budget * m // max(1, len(vertex)))
+
+    def score_balls(self, centres, radius, leaves, budget=1 << 22):
+        '''For each centre index, return the number of leaves (a boolean mask over
+        indices) within radius of it in the residual tree, and the number of vertices
+        remove_nhood would remove for that ball, as two arrays.
+
+        The balls are found by one batched BFS per chunk of centres (chunks are sized to
+        keep about budget vertices in memory). Peeling a ball B removes all of it unless
+        the set W of vertices just outside it (at distance radius + 1) has two or more
+        vertices. In that case exactly the vertices of B on paths between them stay, and
+        there are |Steiner tree of W| - |W| of those. The size of a Steiner tree comes
+        from walking W in depth first order: the distances between consecutive vertices
+        (cyclically) add up to twice its number of edges.'''
+        centres = np.asarray(centres)
+        num_leaves = np.zeros(len(centres), dtype=np.int64)
+        num_removed = np.zeros(len(centres), dtype=np.int64)
+        preorder = self.distances.preorder()
+
+        start = 0
+        chunk = 1
+        while start < len(centres):
+            stop = min(start + chunk, len(centres))
+            m = stop - start
+            layers = self._ball_layers(centres[start:stop], radius)
+
+            owner = np.concatenate([layer[0] for layer in layers[:-1]])
+            vertex = np.concatenate([layer[1] for layer in layers[:-1]])
+            ball_size = np.bincount(owner, minlength=m)
+            num_leaves[start:stop] = np.bincount(owner, weights=leaves[vertex], minlength=m)
+
+            # The vertices just outside each ball, in depth first order
+            outside_owner, outside = layers[-1]
+            order = np.lexsort((preorder[outside], outside_owner))
+            outside_owner, outside = outside_owner[order], outside[order]
+            num_outside = np.bincount(outside_owner, minlength=m)
+
+            # Distance from each outside vertex to the next one of the same ball
+            following = np.arange(1, len(outside) + 1)
+            ends = np.cumsum(num_outside)
+            has_outside = num_outside > 0
+            following[ends[has_outside] - 1] = (ends - num_outside)[has_outside]
+            steps = self.distances._pair_distances(outside, outside[following])
+            tour = np.bincount(outside_owner, weights=steps, minlength=m).astype(np.int64)
+            kept = np.where(num_outside >= 2, tour // 2 + 1 - num_outside, 0)
+            num_removed[start:stop] = ball_size - kept
+
+            start = stop
+            chunk = max(1, budget * m // max(1, len(vertex) + len(outside)))
+
+        return num_leaves, num_removed
@@ -0,0 +1,60 @@
+import numpy as np
+
+from .compact_tree import CompactTree, bfs_levels
+from .tree_metrics import centres
+
+
+def _rooted_form(tree, root):
+    '''Return the canonical level sequence of the tree rooted at root, and the vertices in
+    the matching preorder.
+
+    This is the AHU algorithm with integers instead of strings: level by level from the
+    bottom, each vertex gets the rank of the sorted tuple of its children's ranks among
+    all such tuples on its level. Isomorphic subtrees get equal ranks, and visiting the
+    children of every vertex in order of rank gives a canonical preorder.'''
+    n = tree.order()
+    order, parent, depth = bfs_levels(tree.indptr, tree.indices, root=root)
+    order, parent, depth = order.tolist(), parent.tolist(), depth.tolist()
+
+    rank = [0] * n
+    children = [[] for _ in range(n)]
+    level_end = n
+    while level_end > 0:
+        level_start = level_end
+        while level_start > 0 and depth[order[level_start - 1]] == depth[order[level_end - 1]]:
+            level_start -= 1
+        level = order[level_start:level_end]
+
+        keys = {v: tuple(sorted(rank[c] for c in children[v])) for v in level}
+        ranks = {key: i for i, key in enumerate(sorted(set(keys.values())))}
+        for v in level:
+            rank[v] = ranks[keys[v]]
+            if parent[v] >= 0:
+                children[parent[v]].append(v)
+        level_end = level_start
+
+    # Depth first, visiting children in increasing order of rank
+    preorder = []
+    stack = [root]
+    while stack:
+        v = stack.pop()
+        preorder.append(v)
+        stack.extend(sorted(children[v], key=rank.__getitem__, reverse=True))
+
+    return [depth[v] for v in preorder], preorder
+
+
+def canonical_form(tree):
+    '''Return (code, vertices) for a tree (networkx graph or CompactTree). code is a bytes
+    string that is equal for two trees exactly when they are isomorphic: the level
+    sequence of the tree rooted at its centre, with the subtrees of every vertex in a
+    canonical order (for two centres, the smaller of the two). vertices lists the vertex
+    numbers in that order, so vertices[i] in one tree corresponds to vertices[i] in any
+    isomorphic tree.'''
+    if not isinstance(tree, CompactTree):
+        tree = CompactTree.from_networkx(tree)
+    if tree.order() == 0:
+        return b'', []
+
+    levels, vertices = min(_rooted_form(tree, centre) for centre in centres(tree))
+    return np.asarray(levels, dtype=np.int32).tobytes(), vertices
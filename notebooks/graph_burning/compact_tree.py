@@ -0,0 +1,184 @@
+import numpy as np
+
+
+def gather_neighbours(indptr, indices, vertices):
+    '''Return the neighbours of all the given vertices, concatenated in CSR order, and
+    how many each vertex has (so np.repeat(vertices, counts) gives the owner of each).'''
+    starts = indptr[vertices]
+    counts = indptr[vertices + 1] - starts
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return indices[np.repeat(starts, counts) + offsets], counts
+
+
+def bfs_levels(indptr, indices, root=0):
+    '''Breadth first search over CSR adjacency arrays of a tree, one level at a time.
+    Returns the vertices in BFS order and the parent (-1 for the root) and depth of each.'''
+    n = len(indptr) - 1
+    parent = np.full(n, -1, dtype=np.int32)
+    depth = np.zeros(n, dtype=np.int32)
+    if n == 0:
+        return np.zeros(0, dtype=np.int32), parent, depth
+
+    seen = np.zeros(n, dtype=bool)
+    seen[root] = True
+    frontier = [root]
+    levels = []
+    narrow = []
+    level = 0
+    adjacency = None
+    while len(frontier) > 0:
+        level += 1
+
+        if len(frontier) <= 16:
+            # Narrow levels (as in long paths) are quicker in plain Python than as
+            # a dozen small array operations each
+            if adjacency is None:
+                adjacency = (indptr.tolist(), indices.tolist())
+            starts, targets = adjacency
+            if isinstance(frontier, np.ndarray):
+                frontier = frontier.tolist()
+            narrow.extend(frontier)
+            next_frontier = []
+            for u in frontier:
+                for w in targets[starts[u]:starts[u + 1]]:
+                    if not seen[w]:
+                        seen[w] = True
+                        parent[w] = u
+                        depth[w] = level
+                        next_frontier.append(w)
+            frontier = next_frontier
+            continue
+
+        frontier = np.asarray(frontier, dtype=np.int32)
+        if narrow:
+            levels.append(np.array(narrow, dtype=np.int32))
+            narrow = []
+        levels.append(frontier)
+
+        # Gather all neighbours of the frontier, keeping the CSR order
+        neighbours, counts = gather_neighbours(indptr, indices, frontier)
+        owners = np.repeat(frontier, counts)
+
+        # In a tree, each unseen neighbour is adjacent to exactly one frontier vertex
+        new = ~seen[neighbours]
+        frontier = neighbours[new]
+        seen[frontier] = True
+        parent[frontier] = owners[new]
+        depth[frontier] = level
+
+    levels.append(np.array(narrow, dtype=np.int32))
+    return np.concatenate(levels), parent, depth
+
+
+class CompactTree:
+    '''A tree stored in flat NumPy arrays: CSR adjacency (indptr, indices) and the
+    parent of every vertex when rooted at vertex 0 (-1 for the root).
+
+    Vertices are numbered 0..n-1. If the tree came from a graph with other vertex
+    names, labels[i] is the name of vertex i, and the burning functions report
+    their sequences using those names.'''
+
+    __slots__ = ('indptr', 'indices', 'parent', 'labels')
+
+    def __init__(self, indptr, indices, labels=None, parent=None):
+        '''parent, the parent array rooted at vertex 0, is found by breadth first search
+        unless given. int32 arrays are kept as they are, memory maps included.'''
+        self.indptr = np.asanyarray(indptr, dtype=np.int32)
+        self.indices = np.asanyarray(indices, dtype=np.int32)
+        self.labels = labels
+        if parent is None:
+            _, parent, _ = bfs_levels(self.indptr, self.indices)
+        self.parent = parent
+
+    @classmethod
+    def from_edges(cls, n, edges, labels=None, parent=None):
+        '''Build a tree on vertices 0..n-1 from an (n - 1) x 2 array of edges. Each
+        vertex keeps its neighbours in the order the edges are given.'''
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        if len(edges) != max(n - 1, 0):
+            raise ValueError("A tree on {} vertices needs {} edges, got {}".format(n, max(n - 1, 0), len(edges)))
+
+        # Interleave both directions of each edge, then stable sort by source vertex
+        sources = edges.ravel()
+        targets = edges[:, ::-1].ravel()
+        order = np.argsort(sources, kind='stable')
+
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+        return cls(indptr, targets[order], labels, parent)
+
+    @classmethod
+    def from_parents(cls, parent, labels=None):
+        '''Build a tree from a parent array (-1 for the root), e.g. from free_trees.'''
+        parent = np.array(parent, dtype=np.int32)
+        children = np.flatnonzero(parent >= 0)
+        edges = np.column_stack((parent[children], children))
+
+        # Reverse the path from vertex 0 up to the root, which roots the array at 0 as
+        # self.parent is, without another breadth first search
+        v, previous = (0 if len(parent) else -1), -1
+        while v >= 0:
+            up = int(parent[v])
+            parent[v] = previous
+            previous, v = v, up
+        return cls.from_edges(len(parent), edges, labels, parent)
+
+    @classmethod
+    def from_networkx(cls, graph):
+        '''Convert a networkx tree, keeping its vertex and neighbour order.'''
+        nodes = list(graph.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+        indices = []
+        for i, node in enumerate(nodes):
+            indices.extend(index[v] for v in graph.adj[node])
+            indptr[i + 1] = len(indices)
+
+        labels = None if nodes == list(range(len(nodes))) else nodes
+        return cls(indptr, indices, labels)
+
+    @classmethod
+    def from_adjacency_matrix(cls, adj_mat):
+        '''Convert a (dense) adjacency matrix, as read by graph_utils.create_adj_mat.'''
+        adj_mat = np.asarray(adj_mat)
+        rows, cols = np.nonzero(np.triu(adj_mat))
+        return cls.from_edges(len(adj_mat), np.column_stack((rows, cols)))
+
+    @classmethod
+    def from_mat_file(cls, filepath):
+        '''Read a tree from a .mat adjacency matrix file (see the trees directory),
+        one row at a time, without building the matrix.'''
+        from .graph_utils import read_dense_edges
+        n, edges = read_dense_edges(filepath)
+        return cls.from_edges(n, edges)
+
+    def to_networkx(self):
+        '''Return the tree as a networkx graph (with the original labels, if any).'''
+        import networkx as nx
+
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes())
+        graph.add_edges_from(self.edges())
+        return graph
+
+    def order(self):
+        '''Return the number of vertices in the tree.'''
+        return len(self.parent)
+
+    def nodes(self):
+        '''Return the vertex names (labels if present, otherwise 0..n-1).'''
+        return list(range(self.order())) if self.labels is None else list(self.labels)
+
+    def neighbours(self, v):
+        '''Return the neighbours of vertex v (by number).'''
+        return self.indices[self.indptr[v]:self.indptr[v + 1]]
+
+    def edges(self):
+        '''Return the edges of the tree as (parent, child) pairs of vertex names.'''
+        nodes = self.nodes()
+        return [(nodes[p], nodes[v]) for v, p in enumerate(self.parent.tolist()) if p >= 0]
+
+    def nbytes(self):
+        '''Return the number of bytes used by the arrays of the tree.'''
+        return self.indptr.nbytes + self.indices.nbytes + self.parent.nbytes
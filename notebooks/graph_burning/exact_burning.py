@@ -0,0 +1,147 @@
+
+from .tree_distance import TreeDistances
+from .lower_bounds import lower_bound
+
+
+class ExactBurner:
+    '''Branch and bound search for the burning number b(T) of a tree.
+
+    A tree can be burned in k rounds exactly when it can be covered by balls of radii
+    0, 1, ..., k-1. The search keeps the set of uncovered vertices as a bitmask and
+    always covers the deepest uncovered vertex v next (rooted at vertex 0). For a given
+    radius r, the ball centred at the rth ancestor of v covers every uncovered vertex
+    that any other radius r ball containing v covers, so the only choice is which of
+    the remaining radii to spend on v. On top of that:
+
+    - radii whose ball would cover no more than a smaller remaining radius are skipped,
+    - branches are cut when the uncovered vertices contain more points pairwise further
+      than 2 * (largest remaining radius) apart than there are radii left,
+    - failed (uncovered, remaining radii) states are cached.'''
+
+    def __init__(self, tree, distances=None):
+        if distances is None:
+            distances = TreeDistances(tree)
+        self.distances = distances
+        self.n = distances.order()
+
+        # Vertex indices from deepest to shallowest (rooted at vertex 0)
+        self.by_depth = sorted(range(self.n), key=lambda v: -int(distances.depth[v]))
+        self._balls = {}
+        self._failed = set()
+
+    def ball(self, v, radius):
+        '''Return the bitmask of vertices within radius of the vertex with index v.'''
+        key = (v, radius)
+        if key not in self._balls:
+            distances = self.distances
+            mask = 1 << v
+            frontier = [v]
+            for _ in range(radius):
+                next_frontier = []
+                for u in frontier:
+                    for w in distances.indices[distances.indptr[u]:distances.indptr[u + 1]].tolist():
+                        if not mask >> w & 1:
+                            mask |= 1 << w
+                            next_frontier.append(w)
+                frontier = next_frontier
+                if not frontier:
+                    break
+            self._balls[key] = mask
+        return self._balls[key]
+
+    def centre_for(self, v, radius):
+        '''Return the centre of the best radius ball covering v (its rth ancestor, or the root).'''
+        return int(self.distances._ancestor(v, min(radius, int(self.distances.depth[v]))))
+
+    def _too_spread(self, uncovered, radii):
+        '''Return True if the uncovered vertices cannot possibly be covered by the radii.'''
+        largest = max(radii)
+        chosen = 0
+        blocked = 0
+        for v in self.by_depth:
+            if uncovered >> v & 1 and not blocked >> v & 1:
+                chosen += 1
+                if chosen > len(radii):
+                    return True
+                blocked |= self.ball(v, 2 * largest)
+        return False
+
+    def _cover(self, uncovered, radii, centres):
+        '''Try to cover the uncovered vertices with balls of the given radii. On success,
+        the centre for each used radius is recorded in centres.'''
+        if uncovered == 0:
+            return True
+        if not radii:
+            return False
+
+        key = (uncovered, radii)
+        if key in self._failed:
+            return False
+        if self._too_spread(uncovered, radii):
+            self._failed.add(key)
+            return False
+
+        # The deepest uncovered vertex has to be covered by one of the remaining radii
+        v = next(u for u in self.by_depth if uncovered >> u & 1)
+        tried = []
+        for radius in sorted(radii):
+            centre = self.centre_for(v, radius)
+            covered = self.ball(centre, radius) & uncovered
+
+            # A smaller radius already covering at least as much is never worse
+            if any(covered | previous == previous for previous in tried):
+                continue
+            tried.append(covered)
+
+            centres[radius] = centre
+            if self._cover(uncovered & ~covered, radii - {radius}, centres):
+                return True
+            del centres[radius]
+
+        self._failed.add(key)
+        return False
+
+    def can_burn(self, k):
+        '''Return a burning sequence of length k if there is one, otherwise None.'''
+        centres = {}
+        if not self._cover((1 << self.n) - 1, frozenset(range(k)), centres):
+            return None
+        return self._sequence(k, centres)
+
+    def _sequence(self, k, centres):
+        '''Turn the centres of a cover into a burning sequence (largest radius first).
+        A source that is already burning when its turn comes is replaced by any
+        unburned vertex, or by 'x' if the whole tree is already burning.'''
+        distances = self.distances
+        sequence = []
+        for i in range(k):
+            radius = k - 1 - i
+            source = centres.get(radius)
+            burned_now = 0
+            for j, earlier in enumerate(sequence):
+                if earlier != 'x':
+                    burned_now |= self.ball(earlier, i - j)
+            if source is None or burned_now >> source & 1:
+                unburned = ~burned_now & ((1 << self.n) - 1)
+                source = (unburned & -unburned).bit_length() - 1 if unburned else 'x'
+            sequence.append(source)
+        return [v if v == 'x' else distances.nodes[v] for v in sequence]
+
+    def lower_bound(self):
+        '''Return a lower bound on b(T) to start the search from (see lower_bounds).'''
+        return lower_bound(self.distances)
+
+
+def burning_number(tree, distances=None):
+    '''Return the burning number of the tree and an optimal burning sequence.
+    Input: a tree (networkx graph or CompactTree); practical up to a few hundred vertices.'''
+    if tree.order() == 0:
+        return 0, []
+
+    burner = ExactBurner(tree, distances)
+    k = burner.lower_bound()
+    while True:
+        sequence = burner.can_burn(k)
+        if sequence is not None:
+            return k, sequence
+        k += 1
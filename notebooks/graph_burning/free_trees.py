@@ -0,0 +1,179 @@
+import numpy as np
+
+
+# Free trees are enumerated as level sequences: the depths of the vertices of a
+# rooted tree listed in preorder, with the root at level 0. This is the algorithm of
+# Wright, Richmond, Odlyzko and McKay (1986), which networkx's nonisomorphic_trees
+# also uses, so trees come out in the same order - but as plain lists and parent
+# arrays instead of graphs.
+
+
+def first_level_sequence(n):
+    '''Return the starting point of the enumeration: the path on n vertices, rooted at its centre.'''
+    return list(range(n // 2 + 1)) + list(range(1, (n + 1) // 2))
+
+
+def _next_rooted_tree(layout, p=None):
+    '''One iteration of the Beyer-Hedetniemi algorithm for rooted trees.'''
+    if p is None:
+        p = len(layout) - 1
+        while layout[p] == 1:
+            p -= 1
+    if p == 0:
+        return None
+
+    q = p - 1
+    while layout[q] != layout[p] - 1:
+        q -= 1
+
+    result = list(layout)
+    for i in range(p, len(result)):
+        result[i] = result[i - p + q]
+    return result
+
+
+def _split_tree(layout):
+    '''Split a level sequence into the left subtree of the root and the rest of the tree.'''
+    try:
+        m = layout.index(1, 2)
+    except ValueError:
+        m = len(layout)
+
+    left = [level - 1 for level in layout[1:m]]
+    rest = [0] + layout[m:]
+    return left, rest
+
+
+def _next_free_tree(layout):
+    '''Return layout if it is the canonical level sequence of a free tree, otherwise
+    jump ahead to the next one.'''
+    left, rest = _split_tree(layout)
+    left_height = max(left)
+    rest_height = max(rest)
+
+    # The left subtree of the root must not be higher, bigger or lexicographically
+    # later than the rest of the tree
+    valid = rest_height >= left_height
+    if valid and rest_height == left_height:
+        if len(left) > len(rest):
+            valid = False
+        elif len(left) == len(rest) and left > rest:
+            valid = False
+
+    if valid:
+        return layout
+
+    p = len(left)
+    new_layout = _next_rooted_tree(layout, p)
+    if layout[p] > 2:
+        new_left, _ = _split_tree(new_layout)
+        suffix = list(range(1, max(new_left) + 2))
+        new_layout[-len(suffix):] = suffix
+    return new_layout
+
+
+def level_sequences(n, start=None):
+    '''Yield the level sequences of all non-isomorphic trees on n vertices. If start is
+    a level sequence yielded by an earlier enumeration, begin from it instead.'''
+    if n <= 0:
+        return
+    if n == 1:
+        yield [0]
+        return
+
+    layout = start if start is not None else _next_free_tree(first_level_sequence(n))
+    while layout is not None:
+        yield layout
+        layout = _next_rooted_tree(layout)
+        if layout is not None:
+            layout = _next_free_tree(layout)
+
+
+def level_sequence_to_parents(layout):
+    '''Return the parent array (-1 for the root) of the tree with the given level sequence.'''
+    parent = np.full(len(layout), -1, dtype=np.int32)
+
+    # The parent of each vertex is the last vertex before it one level up
+    last_at_level = []
+    for i, level in enumerate(layout):
+        del last_at_level[level:]
+        if level > 0:
+            parent[i] = last_at_level[level - 1]
+        last_at_level.append(i)
+
+    return parent
+
+
+def free_tree_layouts(n, start=0, count=None, start_layout=None):
+    '''Yield the level sequences of the non-isomorphic trees on n vertices with index
+    start, start + 1, ... (count of them, or all the rest). If start_layout is given,
+    it is taken to be the level sequence of tree number start, and nothing needs to
+    be skipped.'''
+    layouts = level_sequences(n, start_layout)
+    if start_layout is None:
+        for _ in zip(range(start), layouts):
+            pass
+
+    for i, layout in enumerate(layouts):
+        if count is not None and i >= count:
+            return
+        yield layout
+
+
+def free_trees(n, start=0, count=None, start_layout=None):
+    '''Yield the parent arrays of the non-isomorphic trees on n vertices with index
+    start, start + 1, ... (see free_tree_layouts). The skipped trees are only stepped
+    over as level sequences.'''
+    for layout in free_tree_layouts(n, start, count, start_layout):
+        yield level_sequence_to_parents(layout)
+
+
+def count_rooted_trees(n):
+    '''Return [r(0), ..., r(n)], where r(k) is the number of rooted trees on k vertices.'''
+    rooted = [0, 1]
+    for m in range(1, n):
+        # r(m + 1) = (1/m) * sum_{k=1..m} (sum_{d | k} d r(d)) r(m - k + 1)
+        total = 0
+        for k in range(1, m + 1):
+            divisor_sum = sum(d * rooted[d] for d in range(1, k + 1) if k % d == 0)
+            total += divisor_sum * rooted[m - k + 1]
+        rooted.append(total // m)
+    return rooted[:n + 1]
+
+
+def count_free_trees(n):
+    '''Return the number of non-isomorphic trees on n vertices (Otter's formula).'''
+    if n <= 0:
+        return 0
+    rooted = count_rooted_trees(n)
+    pairs = sum(rooted[k] * rooted[n - k] for k in range(1, n))
+    if n % 2 == 0:
+        pairs -= rooted[n // 2]
+    return rooted[n] - pairs // 2
+
+
+def shard_range(n, shard, num_shards):
+    '''Return the range (start, stop) of tree indices making up shard number shard
+    (0 <= shard < num_shards) of the trees on n vertices.'''
+    total = count_free_trees(n)
+    return shard * total // num_shards, (shard + 1) * total // num_shards
+
+
+def shard_starts(n, shard_size, start=0):
+    '''Yield (index, level sequence, count) for consecutive shards of shard_size trees
+    on n vertices, beginning at tree number start. Each shard can be enumerated on its
+    own with free_trees(n, index, count, start_layout=level sequence).'''
+    layouts = level_sequences(n)
+    for _ in zip(range(start), layouts):
+        pass
+
+    index = start
+    while True:
+        first = next(layouts, None)
+        if first is None:
+            return
+        count = 1
+        for _ in zip(range(shard_size - 1), layouts):
+            count += 1
+        yield index, first, count
+        index += count
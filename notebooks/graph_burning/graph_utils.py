@@ -0,0 +1,174 @@
+import os
+from pprint import pprint
+from itertools import islice
+from contextlib import nullcontext
+import numpy as np
+
+def create_adj_mat(filepath):
+    '''Given a filepath, reads the contents and returns an adjacency matrix.'''
+    adj_mat = []
+    with open(filepath, 'r') as file:
+        # Read all lines from the file...
+        lines = [line.strip() for line in file]
+
+        for line in lines:
+            if len(line) > 0:
+                adj_mat.append([int(x) for x in line.split(' ')])
+    
+    return np.array(adj_mat)
+
+
+def _content_lines(file):
+    '''Yield the stripped, non-empty lines of a file that are not # comments.'''
+    for line in file:
+        line = line.strip()
+        if len(line) > 0 and not line.startswith('#'):
+            yield line
+
+
+def _open_text(filepath):
+    '''Open a text file by path, or rewind an already open one (e.g. an io.StringIO
+    holding the file's contents) to read it from the start.'''
+    if hasattr(filepath, 'read'):
+        filepath.seek(0)
+        return nullcontext(filepath)
+    return open(filepath, 'r')
+
+
+def sniff_format(filepath):
+    '''Guess whether a text file holds a dense adjacency matrix ('dense', as in the
+    trees directory) or an edge list with one "u v" pair per line ('edges').'''
+    with _open_text(filepath) as file:
+        first_lines = list(islice(_content_lines(file), 3))
+
+    if len(first_lines) == 0:
+        return 'edges'
+    if len(first_lines[0].split()) != 2:
+        return 'dense'
+
+    # Only the 2 x 2 matrix of a single edge looks like an edge list (and, read as one,
+    # it would list the same edge twice)
+    if [line.split() for line in first_lines] == [['0', '1'], ['1', '0']]:
+        return 'dense'
+    return 'edges'
+
+
+def _integer_rows(lines, filepath):
+    '''Return lines of whitespace separated integers from a text file as an int64
+    array, one row per line. Raises ValueError if a token is not an integer or the
+    lines do not all hold the same number of them.'''
+    try:
+        return np.loadtxt(lines, dtype=np.int64, comments=None, ndmin=2)
+    except ValueError as error:
+        raise ValueError("{}: {}".format(filepath, error)) from None
+
+
+def read_dense_edges(filepath):
+    '''Stream a dense adjacency matrix file one row at a time, keeping only the edges.
+    Returns the number of vertices and an (m, 2) array of edges (i, j) with i < j, in
+    the same order as the nonzero entries of the upper triangle.'''
+    edges = []
+    n = 0
+    width = None
+    with _open_text(filepath) as file:
+        for line in _content_lines(file):
+            row = _integer_rows([line], filepath)[0]
+            if width is None:
+                width = len(row)
+            if len(row) != width:
+                raise ValueError("Row {} of adjacency matrix {} has {} entries, the first {}".format(
+                    n, filepath, len(row), width))
+            above = np.flatnonzero(row[n + 1:]) + n + 1
+            edges.append(np.column_stack((np.full(len(above), n), above)))
+            n += 1
+
+    if n == 0:
+        return 0, np.zeros((0, 2), dtype=np.int64)
+    if n != width:
+        raise ValueError("Adjacency matrix {} has {} rows of {} entries".format(filepath, n, width))
+    return n, np.concatenate(edges)
+
+
+def read_edge_list(filepath, block_size=1 << 16):
+    '''Stream an edge list file (one "u v" pair per line, # comments allowed), parsing
+    block_size lines at a time. Returns the number of vertices, an (m, 2) array of
+    edges between vertices 0..n-1, and the original vertex names if they were not
+    already 0..n-1 (otherwise None).'''
+    blocks = []
+    with _open_text(filepath) as file:
+        lines = _content_lines(file)
+        while True:
+            block = list(islice(lines, block_size))
+            if len(block) == 0:
+                break
+            pairs = _integer_rows(block, filepath)
+            if pairs.shape[1] != 2:
+                raise ValueError("Every line of edge list {} must hold exactly two vertices".format(filepath))
+            blocks.append(pairs)
+
+    if len(blocks) == 0:
+        return 0, np.zeros((0, 2), dtype=np.int64), None
+    edges = np.concatenate(blocks)
+
+    # Renumber the vertices 0..n-1 (in increasing order of name) if necessary
+    names, edges_renumbered = np.unique(edges, return_inverse=True)
+    n = len(names)
+    if names[0] == 0 and names[-1] == n - 1:
+        return n, edges, None
+    return n, edges_renumbered.reshape(-1, 2), names.tolist()
+
+
+# The arrays save_tree writes, one .npy file each, in a directory of their own
+TREE_ARRAYS = ('indptr', 'indices', 'parent')
+
+
+def load_tree(filepath):
+    '''Read a tree without ever building an adjacency matrix. Handles directories
+    written by save_tree (memory mapped), .npy parent arrays, dense adjacency matrices
+    and edge lists (detected from the contents). filepath may also be an open text
+    file. Returns a CompactTree.'''
+    from .compact_tree import CompactTree
+
+    if isinstance(filepath, str) and os.path.isdir(filepath):
+        # The tree uses the mapped arrays directly: nothing is read until it is used
+        indptr, indices, parent = [np.load(os.path.join(filepath, name + '.npy'), mmap_mode='r')
+                                   for name in TREE_ARRAYS]
+        labels_path = os.path.join(filepath, 'labels.npy')
+        labels = np.load(labels_path).tolist() if os.path.exists(labels_path) else None
+        return CompactTree(indptr, indices, labels, parent)
+
+    if isinstance(filepath, str) and filepath.endswith('.npy'):
+        # A bare parent array (as free_trees gives), from which the adjacency is built
+        return CompactTree.from_parents(np.load(filepath))
+
+    if sniff_format(filepath) == 'dense':
+        n, edges = read_dense_edges(filepath)
+        return CompactTree.from_edges(n, edges)
+
+    n, edges, labels = read_edge_list(filepath)
+    return CompactTree.from_edges(n, edges, labels)
+
+
+def save_tree(directory, tree):
+    '''Save a CompactTree as a directory (created if need be) of .npy files holding
+    its adjacency arrays, parent array and labels, which load_tree maps straight into
+    memory. The tree comes back the same, neighbour order included. Labels must be
+    numbers or strings.
+
+    Each file is written under a temporary name and moved into place, so trees
+    already loaded from the directory keep their (old) arrays.'''
+    os.makedirs(directory, exist_ok=True)
+    arrays = {name: np.asarray(getattr(tree, name), dtype=np.int32) for name in TREE_ARRAYS}
+    if tree.labels is not None:
+        arrays['labels'] = np.asarray(tree.labels)
+    for name, array in arrays.items():
+        path = os.path.join(directory, name + '.npy')
+        with open(path + '.tmp', 'wb') as file:
+            np.save(file, array)
+        os.replace(path + '.tmp', path)
+    if tree.labels is None and os.path.exists(os.path.join(directory, 'labels.npy')):
+        os.remove(os.path.join(directory, 'labels.npy'))
+
+if __name__ == '__main__':
+    pprint(create_adj_mat('../trees/cross.mat'))
+    pprint(create_adj_mat('../trees/ethane.mat'))    
@@ -0,0 +1,221 @@
+import argparse
+from multiprocessing import Pool
+
+import numpy as np
+
+from .burn_tree import burn, parse_algs
+from .compact_tree import CompactTree, gather_neighbours
+from .graph_utils import read_dense_edges, read_edge_list, sniff_format
+from .tree_metrics import diameter
+from .verify_burning import adjacency, verify_burning_sequence
+
+
+# A graph G is burned by any burning sequence of one of its spanning trees T, since
+# distances only get shorter in G, so b(G) <= b(T). This module burns connected graphs
+# by running the tree heuristics on a few spanning trees with small diameter (breadth
+# first search trees from vertices of low eccentricity, and a minimum diameter
+# spanning tree) and keeping the shortest sequence that burns G.
+
+
+parser = argparse.ArgumentParser(description='Burn a connected graph through its spanning trees')
+parser.add_argument('graph', type=str, help='a graph file: a dense adjacency matrix or an edge list')
+parser.add_argument('--alg',
+                    type=str,
+                    default='all',
+                    help='the tree heuristics to use, as for burn_all_trees.py (default all)')
+parser.add_argument('--trees',
+                    type=int,
+                    default=4,
+                    help='number of breadth first search trees to burn (default 4)')
+parser.add_argument('--no-mdst',
+                    action='store_true',
+                    help='skip the minimum diameter spanning tree, which takes a breadth first search '
+                         'from every vertex')
+parser.add_argument('--workers',
+                    type=int,
+                    default=1,
+                    help='number of worker processes to burn the trees with (default 1, no pool)')
+
+
+def graph_bfs(indptr, indices, sources):
+    '''Breadth first search over the CSR adjacency arrays of any graph, from all the
+    sources at once. Returns the distance of every vertex from the nearest source (-1 if
+    unreachable) and its parent in the search (-1 for sources and unreachable vertices);
+    a vertex is reached through the first frontier vertex listing it.'''
+    n = len(indptr) - 1
+    dist = np.full(n, -1, dtype=np.int32)
+    parent = np.full(n, -1, dtype=np.int32)
+    frontier = np.unique(np.asarray(sources, dtype=np.int32))
+    dist[frontier] = 0
+
+    level = 0
+    while len(frontier) > 0:
+        level += 1
+        neighbours, counts = gather_neighbours(indptr, indices, frontier)
+        owners = np.repeat(frontier, counts)
+
+        new = dist[neighbours] < 0
+        frontier, first = np.unique(neighbours[new], return_index=True)
+        dist[frontier] = level
+        parent[frontier] = owners[new][first]
+
+    return dist, parent
+
+
+def spanning_tree(indptr, indices, centre):
+    '''Return the breadth first search tree of a connected graph (CSR arrays) from centre,
+    a vertex or a pair of adjacent vertices (the tree then contains their edge), as a
+    CompactTree on the same vertex numbers.'''
+    centre = np.atleast_1d(centre)
+    dist, parent = graph_bfs(indptr, indices, centre)
+    if (dist < 0).any():
+        raise ValueError("The graph is not connected")
+    if len(centre) == 2:
+        parent[centre[1]] = centre[0]
+    return CompactTree.from_parents(parent)
+
+
+def low_eccentricity_roots(indptr, indices, count):
+    '''Return up to count vertices of small eccentricity, best first, with their
+    eccentricities.
+
+    Candidates come from a double sweep (the vertices most central between the two ends
+    a, b of a long shortest path) and the highest degree vertices; each candidate's
+    eccentricity is then found exactly by one breadth first search.'''
+    n = len(indptr) - 1
+    degree = np.diff(indptr)
+    start = int(np.argmax(degree))
+    a = int(np.argmax(graph_bfs(indptr, indices, [start])[0]))
+    dist_a = graph_bfs(indptr, indices, [a])[0]
+    b = int(np.argmax(dist_a))
+    dist_b = graph_bfs(indptr, indices, [b])[0]
+
+    # Ties are broken by vertex number, so the candidates do not depend on the sort
+    spread = np.maximum(dist_a, dist_b)
+    central = np.lexsort((np.arange(n), spread))[:2 * count]
+    busiest = np.lexsort((np.arange(n), -degree))[:count]
+    candidates = list(dict.fromkeys(central.tolist() + busiest.tolist() + [start]))
+
+    eccentricities = [int(graph_bfs(indptr, indices, [v])[0].max()) for v in candidates]
+    best = sorted(zip(eccentricities, candidates))[:count]
+    return [v for _, v in best], [e for e, _ in best]
+
+
+def minimum_diameter_spanning_tree(indptr, indices):
+    '''Return a minimum diameter spanning tree of a connected graph (CSR arrays), as a
+    CompactTree, and its centre (a vertex or a pair of adjacent vertices).
+
+    For unit edge lengths, a breadth first search tree from an absolute centre of the
+    graph (a point minimising the distance to the farthest vertex, which may be a vertex
+    or the middle of an edge) has minimum diameter (Hassin and Tamir, 1995). A vertex
+    centre gives diameter 2 rad(G); the middle of edge uv gives 2 r + 1, where r is the
+    eccentricity of {u, v}, which only beats it if r < rad(G), and then u and v both
+    have eccentricity rad(G). So only edges between central vertices need checking, and
+    the whole search takes a breadth first search from every vertex: O(nm) time, O(n + m)
+    memory.'''
+    n = len(indptr) - 1
+    eccentricity = np.array([graph_bfs(indptr, indices, [v])[0].max() for v in range(n)])
+    if n > 0 and eccentricity.min() < 0:
+        raise ValueError("The graph is not connected")
+    radius = int(eccentricity.min())
+    centres = np.flatnonzero(eccentricity == radius)
+
+    centre = int(centres[0])
+    is_centre = eccentricity == radius
+    for u in centres.tolist():
+        for v in indices[indptr[u]:indptr[u + 1]].tolist():
+            if u < v and is_centre[v] and graph_bfs(indptr, indices, [u, v])[0].max() < radius:
+                return spanning_tree(indptr, indices, [u, v]), (u, v)
+    return spanning_tree(indptr, indices, centre), centre
+
+
+def burn_spanning_tree(tree, algs):
+    '''Burn a spanning tree with each of the algorithms. Returns (alg, sequence) pairs.'''
+    return [(alg, burn(tree, alg)) for alg in algs]
+
+
+def burn_graph(graph, algs='all', num_trees=4, mdst=True, pool=None):
+    '''Burn a connected graph (networkx graph or CompactTree) with the tree heuristics,
+    run on num_trees breadth first search trees from vertices of low eccentricity and,
+    if mdst is set, on a minimum diameter spanning tree. algs is a list of algorithms or
+    a string as for burn_all_trees.py --alg. The trees are burned in the pool, if given.
+
+    Returns the shortest sequence that burns the graph (None if none does), and a list
+    with a dict for every tree and algorithm tried: the tree's 'centre' and 'diameter',
+    the 'alg', the 'sequence' (in the graph's vertex names) and whether it is 'valid'
+    for the graph. The empty graph is burned by the empty sequence, with no trees tried.'''
+    if isinstance(algs, str):
+        algs = parse_algs(algs)
+    indptr, indices, nodes, _ = adjacency(graph)
+    results = []
+    if len(nodes) == 0:
+        return [], results
+
+    centres, _ = low_eccentricity_roots(indptr, indices, num_trees)
+    trees = [spanning_tree(indptr, indices, centre) for centre in centres]
+    if mdst:
+        tree, centre = minimum_diameter_spanning_tree(indptr, indices)
+        if centre not in centres:
+            centres.append(centre)
+            trees.append(tree)
+
+    jobs = [(tree, algs) for tree in trees]
+    burned = pool.starmap(burn_spanning_tree, jobs) if pool is not None else [burn_spanning_tree(*job) for job in jobs]
+
+    def name(v):
+        return v if v == 'x' else nodes[v]
+
+    for centre, tree, sequences in zip(centres, trees, burned):
+        for alg, sequence in sequences:
+            sequence = [name(v) for v in sequence]
+            results.append({'centre': [name(v) for v in np.atleast_1d(centre).tolist()],
+                            'diameter': diameter(tree)[2],
+                            'alg': alg,
+                            'sequence': sequence,
+                            'valid': not verify_burning_sequence(graph, sequence)})
+
+    valid = [result for result in results if result['valid']]
+    if not valid:
+        return None, results
+    return min(valid, key=lambda result: len(result['sequence']))['sequence'], results
+
+
+def load_graph(filepath):
+    '''Read a graph file, a dense adjacency matrix or an edge list, as a networkx graph.'''
+    import networkx as nx
+
+    if sniff_format(filepath) == 'dense':
+        n, edges = read_dense_edges(filepath)
+        labels = None
+    else:
+        n, edges, labels = read_edge_list(filepath)
+
+    graph = nx.Graph()
+    graph.add_nodes_from(range(n) if labels is None else labels)
+    graph.add_edges_from(edges.tolist() if labels is None else ((labels[u], labels[v]) for u, v in edges.tolist()))
+    return graph
+
+
+def main(argv=None):
+    '''Burn the graph file named on the command line (argv, default sys.argv[1:]).'''
+    args = parser.parse_args(argv)
+    graph = load_graph(args.graph)
+    print("{} vertices, {} edges".format(graph.order(), graph.size()))
+
+    pool = Pool(args.workers) if args.workers > 1 else None
+    burning_sequence, results = burn_graph(graph, args.alg, args.trees, not args.no_mdst, pool)
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    for result in results:
+        print('centre {centre} | tree diameter {diameter:3d} | {alg:5s} | length {length:3d}{invalid}'.format(
+            length=len(result['sequence']), invalid='' if result['valid'] else ' | does not burn the graph', **result))
+    if burning_sequence is None:
+        print("No spanning tree gave a sequence that burns the graph")
+    else:
+        print("Best burning sequence ({}): {}".format(len(burning_sequence), burning_sequence))
+
+
+if __name__ == '__main__':
+    main()
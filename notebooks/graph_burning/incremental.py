@@ -0,0 +1,218 @@
+import json
+import sqlite3
+
+from .lower_bounds import ceil_sqrt
+
+
+# Every tree T on n vertices is a tree T - v on n - 1 vertices with a leaf v added, and
+# a sequence burning T - v burns T with one more source: v itself, last (every other
+# source then burns one step further). If the leaf's neighbour is burned with a step to
+# spare, the sequence burns T as it is. So once the trees of order n - 1 have been
+# burned, a sequence for each tree of order n can be derived from one of them, at the
+# cost of looking it up, and the heuristics only need to run when that sequence is
+# longer than ceil(sqrt(n)).
+#
+# The store keeps one summary per tree: its canonical code, the shortest sequence found
+# for it (as positions in the canonical vertex order, so it can be used on any tree
+# isomorphic to it) and its slack, ceil(sqrt(n)) less the sequence's length.
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS summaries (
+    n INTEGER NOT NULL,
+    tree TEXT NOT NULL,
+    sequence TEXT NOT NULL,
+    slack INTEGER NOT NULL,
+    PRIMARY KEY (n, tree)
+) WITHOUT ROWID;
+'''
+
+
+def neighbour_lists(tree):
+    '''Return the neighbour lists of a CompactTree, indexed by vertex.'''
+    indptr, indices = tree.indptr.tolist(), tree.indices.tolist()
+    return [indices[indptr[v]:indptr[v + 1]] for v in range(len(indptr) - 1)]
+
+
+def _rooted_code(neighbours, root, removed):
+    '''Return the AHU code of the tree rooted at root, not entering removed vertices (a
+    list of flags, which this sets for the vertices it visits), and its vertices in
+    preorder with the children of every vertex in order of code.'''
+    order = [root]
+    parent = {root: -1}
+    removed[root] = True
+    for v in order:
+        for u in neighbours[v]:
+            if not removed[u]:
+                removed[u] = True
+                parent[u] = v
+                order.append(u)
+
+    code = {}
+    children = {v: [] for v in order}
+    for v in reversed(order):
+        kids = children[v]
+        if not kids:
+            code[v] = '()'
+        else:
+            if len(kids) > 1:
+                kids.sort(key=code.__getitem__)
+            code[v] = '(' + ''.join([code[c] for c in kids]) + ')'
+        if v != root:
+            children[parent[v]].append(v)
+
+    preorder = []
+    stack = [root]
+    while stack:
+        v = stack.pop()
+        preorder.append(v)
+        stack.extend(reversed(children[v]))
+    return code[root], preorder
+
+
+def tree_code(neighbours, skip=None):
+    '''Return (code, vertices) for the tree with the given neighbour lists, less the leaf
+    skip if given. code is a string equal for two trees exactly when they are
+    isomorphic, and vertices lists the vertex numbers in a canonical order, so that
+    vertices[i] in one tree corresponds to vertices[i] in any isomorphic tree.
+
+    This is canonical.canonical_form's job, done with strings in plain Python, which is
+    several times quicker on trees of the few dozen vertices a sweep burns: the tree is
+    rooted at its centre (found by peeling off leaves), or at its central edge.'''
+    n = len(neighbours)
+    degree = [len(adjacent) for adjacent in neighbours]
+    removed = [False] * n
+    remaining = n
+    if skip is not None:
+        removed[skip] = True
+        remaining -= 1
+        for u in neighbours[skip]:
+            degree[u] -= 1
+    if remaining == 0:
+        return '', []
+
+    layer = [v for v in range(n) if not removed[v] and degree[v] <= 1]
+    while remaining > 2:
+        remaining -= len(layer)
+        for v in layer:
+            removed[v] = True
+        next_layer = []
+        for v in layer:
+            for u in neighbours[v]:
+                if not removed[u]:
+                    degree[u] -= 1
+                    if degree[u] == 1:
+                        next_layer.append(u)
+        layer = next_layer
+
+    # Everything but the centre is off the list again for the rooted codes
+    removed = [False] * n
+    if skip is not None:
+        removed[skip] = True
+    if len(layer) == 1:
+        return _rooted_code(neighbours, layer[0], removed)
+
+    a, b = layer
+    removed[b] = True
+    side_a = _rooted_code(neighbours, a, removed)
+    removed[b] = False
+    side_b = _rooted_code(neighbours, b, removed)
+    first, second = sorted([side_a, side_b])
+    return first[0] + second[0], first[1] + second[1]
+
+
+def covers(neighbours, sources, v):
+    '''Return True if the burning sequence sources (vertex numbers, or 'x') burns v.'''
+    k = len(sources)
+    radius = {}
+    for i, source in enumerate(sources):
+        if source != 'x':
+            radius[source] = max(radius.get(source, -1), k - 1 - i)
+
+    # Breadth first from v, as far as the largest radius
+    frontier, seen = [v], {v}
+    for distance in range(k):
+        if any(radius.get(u, -1) >= distance for u in frontier):
+            return True
+        frontier = [w for u in frontier for w in neighbours[u] if w not in seen]
+        seen.update(frontier)
+    return False
+
+
+def derive_sequence(neighbours, lookup, tries=2):
+    '''Return the shortest burning sequence (vertex numbers) of a tree that can be
+    derived from the sequences of the trees left when one of its leaves is removed, or
+    None if none is known. lookup(code) returns the sequence of the tree with that
+    tree_code (in canonical positions), or None. At most tries leaves are looked up, and
+    the search stops at the first sequence that needs no extra source.'''
+    best = None
+    for v in range(len(neighbours)):
+        if len(neighbours[v]) != 1:
+            continue
+        if tries == 0:
+            break
+        tries -= 1
+
+        code, vertices = tree_code(neighbours, skip=v)
+        stored = lookup(code)
+        if stored is None:
+            continue
+        sources = [source if source == 'x' else vertices[source] for source in stored]
+        extended = not covers(neighbours, sources, v)
+        if extended:
+            sources.append(v)
+        if best is None or len(sources) < len(best):
+            best = sources
+        if not extended:
+            break
+    return best
+
+
+def summary(neighbours, sequence):
+    '''Return the store row (n, code, sequence, slack) for a tree and a burning sequence
+    of it in vertex numbers.'''
+    n = len(neighbours)
+    code, vertices = tree_code(neighbours)
+    position = {v: i for i, v in enumerate(vertices)}
+    canonical = [source if source == 'x' else position[source] for source in sequence]
+    return n, code, json.dumps(canonical), ceil_sqrt(n) - len(sequence)
+
+
+class SummaryStore:
+    '''SQLite store of per-tree summaries (see summary). Rows are buffered and written
+    batch_size at a time, each batch in a single transaction; a summary for a tree
+    already in the store replaces it.'''
+
+    def __init__(self, path, batch_size=10000):
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.pending = []
+
+    def get(self, n, code):
+        '''Return the sequence (in canonical positions) stored for the tree on n vertices
+        with the given code, or None.'''
+        row = self.connection.execute('SELECT sequence FROM summaries WHERE n = ? AND tree = ?', (n, code)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def add(self, rows):
+        '''Queue rows (see summary) for writing.'''
+        self.pending.extend(rows)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            with self.connection:
+                self.connection.executemany('INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)', self.pending)
+            self.pending = []
+
+    def count(self, n):
+        '''Return the number of trees on n vertices with a summary.'''
+        return self.connection.execute('SELECT COUNT(*) FROM summaries WHERE n = ?', (n,)).fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.connection.close()
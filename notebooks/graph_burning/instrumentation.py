@@ -0,0 +1,93 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class NullCollector:
+    '''Collector that ignores everything, used when no instrumentation is asked for.
+    Every method is a no-op, so an uninstrumented burn only pays for the calls.'''
+
+    enabled = False
+    _no_phase = nullcontext()
+
+    def start_burn(self):
+        pass
+
+    def next_round(self):
+        pass
+
+    def phase(self, name):
+        return self._no_phase
+
+    def count(self, name, amount=1):
+        pass
+
+
+NULL_COLLECTOR = NullCollector()
+
+
+class Collector:
+    '''Collects timings and counters from the burning heuristics.
+
+    Pass one as the collector argument of a heuristic (or of several, or the same one
+    across many trees). Each heuristic calls start_burn once, next_round after each
+    round of burning, times its phases with "with collector.phase(name):" and counts
+    work with collector.count(name, amount). Phase times are totals; counters are kept
+    per round i, so the report shows where in a burn the work happens.'''
+
+    enabled = True
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.counters = {}
+        self.burns = 0
+        self.round = 0
+
+    def start_burn(self):
+        self.burns += 1
+        self.round = 0
+
+    def next_round(self):
+        self.round += 1
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, amount=1):
+        per_round = self.counters.setdefault(name, [])
+        if len(per_round) <= self.round:
+            per_round.extend([0] * (self.round + 1 - len(per_round)))
+        per_round[self.round] += amount
+
+    def merge(self, other):
+        '''Add the measurements of another collector (e.g. from a worker process) to this one.'''
+        for name, seconds in other.seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + other.calls[name]
+        for name, per_round in other.counters.items():
+            mine = self.counters.setdefault(name, [])
+            mine.extend([0] * (len(per_round) - len(mine)))
+            for i, amount in enumerate(per_round):
+                mine[i] += amount
+        self.burns += other.burns
+
+    def report(self):
+        '''Return a summary of the measurements as text.'''
+        lines = ["Burns: {}".format(self.burns)]
+
+        total = sum(self.seconds.values())
+        lines.append("{:24s} {:>10s} {:>7s} {:>10s}".format('phase', 'seconds', 'share', 'calls'))
+        for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1]):
+            lines.append("{:24s} {:10.3f} {:6.1f}% {:10d}".format(name, seconds, 100 * seconds / total if total else 0,
+                                                                 self.calls[name]))
+
+        lines.append("{:24s} {:>10s}   per round i = 0, 1, ...".format('counter', 'total'))
+        for name, per_round in sorted(self.counters.items()):
+            lines.append("{:24s} {:10d}   {}".format(name, sum(per_round), per_round))
+        return '\n'.join(lines)
@@ -0,0 +1,78 @@
+import math
+
+from .compact_tree import bfs_levels
+from .tree_metrics import _csr, diameter
+
+
+# Certified lower bounds on the burning number b(T) of a tree. A burning sequence of
+# length m places balls of radii m - 1, m - 2, ..., 0, so:
+#
+# - a longest path (diameter d) meets each ball of radius r in at most 2r + 1 vertices,
+#   and these add up to m^2, so m >= ceil(sqrt(d + 1));
+# - every ball of a sequence of length m <= k - 1 has diameter at most 2k - 4, so it
+#   holds at most one of any k vertices that are pairwise at least 2k - 3 apart, and
+#   such vertices need b(T) >= k.
+
+
+def ceil_sqrt(x):
+    '''Return ceil(sqrt(x)) for an integer x >= 0, exactly.'''
+    return math.isqrt(x - 1) + 1 if x > 0 else 0
+
+
+def diameter_bound(tree):
+    '''Return ceil(sqrt(diameter + 1)) for a tree (networkx graph, CompactTree or
+    TreeDistances).'''
+    if tree.order() == 0:
+        return 0
+    return ceil_sqrt(diameter(tree)[2] + 1)
+
+
+def packing(tree, distance, limit=None):
+    '''Return vertex indices of the tree that are pairwise at least distance apart,
+    found greedily, deepest first (rooted at vertex 0); stop once limit are found.
+
+    Each vertex looks for a chosen vertex through its ancestors up to distance - 1
+    steps away, and each choice updates the distance to the nearest chosen vertex below
+    its ancestors as far up, so this takes O(n * distance).'''
+    indptr, indices = _csr(tree)
+    order, parent, _ = bfs_levels(indptr, indices)
+    parent = parent.tolist()
+
+    # nearest[a] is the distance from a down to the nearest chosen vertex below it
+    nearest = [distance] * len(parent)
+    chosen = []
+    for v in reversed(order.tolist()):
+        # Any chosen vertex s is reached through a = lca(s, v), at distance at most
+        # nearest[a] + dist(a, v); this is exact for the closest one
+        a, steps = v, 0
+        while a >= 0 and steps < distance and nearest[a] + steps >= distance:
+            a, steps = parent[a], steps + 1
+        if a >= 0 and steps < distance:
+            continue
+
+        chosen.append(v)
+        if limit is not None and len(chosen) >= limit:
+            break
+        a, steps = v, 0
+        while a >= 0 and steps < nearest[a]:
+            nearest[a] = steps
+            a, steps = parent[a], steps + 1
+
+    return chosen
+
+
+def packing_bound(tree, at_least=1):
+    '''Return the largest k (from at_least up) for which packing finds k vertices
+    pairwise at least 2k - 3 apart, a lower bound on b(T).'''
+    k = at_least
+    while len(packing(tree, 2 * k - 1, limit=k + 1)) > k:
+        k += 1
+    return k
+
+
+def lower_bound(tree):
+    '''Return the best of the lower bounds on b(T) for a tree (networkx graph,
+    CompactTree or TreeDistances).'''
+    if tree.order() == 0:
+        return 0
+    return packing_bound(tree, diameter_bound(tree))
@@ -0,0 +1,131 @@
+import math
+import sqlite3
+import argparse
+
+from .compact_tree import CompactTree
+from .free_trees import level_sequence_to_parents
+
+
+# One row per (order, heuristic, tree). Trees are stored by their canonical level
+# sequence (as produced by free_trees), one byte per vertex. The primary key doubles as
+# the index by order and heuristic, and makes re-running part of a sweep harmless.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    n INTEGER NOT NULL,
+    alg TEXT NOT NULL,
+    tree BLOB NOT NULL,
+    length INTEGER NOT NULL,
+    gap INTEGER NOT NULL,
+    valid INTEGER NOT NULL,
+    seconds REAL,
+    exact INTEGER,
+    PRIMARY KEY (n, alg, tree)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_by_gap ON results (n, alg, gap);
+'''
+
+
+def tree_code(layout):
+    '''Return the compact code of the tree with the given level sequence.'''
+    return bytes(layout)
+
+
+def tree_from_code(code):
+    '''Return the tree with the given code as a CompactTree.'''
+    return CompactTree.from_parents(level_sequence_to_parents(list(code)))
+
+
+def make_record(layout, alg, length, valid=True, seconds=None, exact=None):
+    '''Return the record of one burn, as stored in the results table.'''
+    n = len(layout)
+    return (n, alg, tree_code(layout), length, length - math.ceil(math.sqrt(n)), int(valid), seconds, exact)
+
+
+class ResultStore:
+    '''SQLite store of per-tree sweep results. Records are buffered and written
+    batch_size at a time, each batch in a single transaction; storing a result for
+    the same tree and heuristic again replaces the old row.'''
+
+    def __init__(self, path, batch_size=10000):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.pending = []
+
+    def add(self, records):
+        '''Queue records (see make_record) for writing.'''
+        self.pending.extend(records)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        '''Write all queued records.'''
+        if self.pending:
+            with self.connection:
+                self.connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                            self.pending)
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def query(self, n=None, alg=None, min_gap=None, limit=None):
+        '''Return the stored records (as tuples like make_record's) for the given order
+        and heuristic, optionally only those at least min_gap over ceil(sqrt(n)).'''
+        self.flush()
+        conditions, parameters = [], []
+        for column, operator, value in [('n', '=', n), ('alg', '=', alg), ('gap', '>=', min_gap)]:
+            if value is not None:
+                conditions.append('{} {} ?'.format(column, operator))
+                parameters.append(value)
+
+        sql = 'SELECT * FROM results'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        if limit is not None:
+            sql += ' LIMIT {:d}'.format(limit)
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def summary(self):
+        '''Return (n, alg, trees, trees over the bound, invalid sequences) for every
+        order and heuristic in the store.'''
+        self.flush()
+        return self.connection.execute('''SELECT n, alg, COUNT(*), SUM(gap > 0), SUM(valid = 0)
+                                          FROM results GROUP BY n, alg ORDER BY n, alg''').fetchall()
+
+
+parser = argparse.ArgumentParser(description='Query a store of sweep results')
+parser.add_argument('store', type=str, help='the SQLite file written by burn_all_trees.py --store')
+parser.add_argument('--order', type=int, default=None, help='only trees of this order')
+parser.add_argument('--alg', type=str, default=None, help='only results of this algorithm')
+parser.add_argument('--exceeds',
+                    action='store_true',
+                    help='only trees where the sequence is longer than ceil(sqrt(n))')
+parser.add_argument('--limit', type=int, default=None, help='print at most this many trees')
+
+
+def main(argv=None):
+    '''Summarise or query the store named on the command line (argv, default sys.argv[1:]).'''
+    args = parser.parse_args(argv)
+    store = ResultStore(args.store)
+
+    if args.order is None and args.alg is None and not args.exceeds:
+        for n, alg, trees, over, invalid in store.summary():
+            print('n={:3d} | {:6s} | {:9d} trees | {:7d} over the bound | {:7d} invalid'.format(n, alg, trees,
+                                                                                               over, invalid))
+    else:
+        for n, alg, code, length, gap, valid, seconds, exact in store.query(args.order, args.alg,
+                                                                            1 if args.exceeds else None,
+                                                                            args.limit):
+            print('n={:3d} | {} | length {} (gap {}){}{}'.format(n, alg, length, gap,
+                                                                 '' if exact is None else ' | exact {}'.format(exact),
+                                                                 '' if valid else ' | INVALID'))
+            print("Edges:", tree_from_code(code).edges())
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import socket
+import threading
+from collections import deque
+
+from .burn_all_trees import burn_shard, save_checkpoint
+from .free_trees import shard_starts
+
+
+# A sweep shared between hosts through a directory they can all see (such as an NFS
+# mount). No process talks to another: they only create, touch, replace and remove
+# files, and every file is written to a temporary name and moved into place.
+#
+#   sweep.json               the algorithms, shard size and options of the sweep
+#   order_<n>/shards.json    [[index, level sequence, count], ...], the shards of order n
+#   order_<n>/<index>.lease  a worker's claim on a shard, created exclusively and touched
+#                            while the shard is burned
+#   order_<n>/<index>.json   the shard's result (see burn_all_trees.burn_trees)
+#   order_<n>/summary.json   all the shards' results merged, once every one is in
+#   done                     the coordinator has finished
+#
+# The coordinator publishes the shards of each order, and those of the next one once
+# every shard is claimed, so workers are not left idle at the end of an order. A
+# claim whose lease has not been touched for lease_seconds (its worker died, or its
+# host went away) is removed, and the shard handed out again. A shard may then be
+# burned twice, but it always gives the same result, so that does no harm. Leases are
+# timed by the file system's clock against the coordinator's, so lease_seconds should
+# be well above any clock skew between the hosts. The directory holds the whole state,
+# so a coordinator that stops can be restarted on it.
+
+
+POLL_SECONDS = 2
+
+
+def read_json(path):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def order_directory(directory, n):
+    return os.path.join(directory, 'order_{}'.format(n))
+
+
+def remove(path):
+    '''Remove a file, if it is still there.'''
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class Lease:
+    '''A worker's claim on a shard. The lease file is created exclusively, so only one
+    worker gets it, and while the lease is held (as a context manager) a thread
+    touches it every interval seconds to show the worker is alive. The file records
+    the claim's host, process and a token, so that a lease that expired and was
+    claimed by another worker is left to that worker when this one lets go.'''
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.owner = {'host': socket.gethostname(), 'pid': os.getpid(), 'token': os.urandom(8).hex()}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._keep_alive, daemon=True)
+
+    @classmethod
+    def claim(cls, path, interval):
+        '''Return the Lease on path, or None if another worker holds it.'''
+        try:
+            descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        lease = cls(path, interval)
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(lease.owner, file)
+        return lease
+
+    def held(self):
+        '''Return True if the lease file is still this claim's.'''
+        try:
+            return read_json(self.path) == self.owner
+        except (FileNotFoundError, ValueError):
+            # Gone, or another worker's claim that is not written yet
+            return False
+
+    def _keep_alive(self):
+        while not self._stop.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                # The coordinator gave the shard to another worker; finishing it anyway
+                # does no harm
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        if self.held():
+            remove(self.path)
+
+
+def merge_results(results):
+    '''Merge the results of burn_trees for several shards, in the order given.'''
+    merged = {'trees': 0, 'counterexamples': [], 'invalid': [], 'stats': {}}
+    for result in results:
+        merged['trees'] += result['trees']
+        merged['counterexamples'].extend(result['counterexamples'])
+        merged['invalid'].extend(result['invalid'])
+        for alg, alg_stats in result['stats'].items():
+            totals = merged['stats'].get(alg, [0, 0, 0, 0.0, 0])
+            merged['stats'][alg] = [total + value for total, value in zip(totals, alg_stats)]
+    return merged
+
+
+def coordinate(directory, sweep, orders, lease_seconds=300, poll_seconds=POLL_SECONDS):
+    '''Coordinate the shared sweep in directory. sweep is a dict with the 'alg' list, the
+    'chunk_size' (trees per shard), and the 'prune' and 'exact_check' options of
+    burn_all_trees.burn_shard; orders is an iterable of the orders to burn. Yields
+    (n, result) for each order, in turn, once all its shards are burned, where result
+    merges the results of the shards (see merge_results). Marks the sweep done at the end.'''
+    os.makedirs(directory, exist_ok=True)
+    sweep_path = os.path.join(directory, 'sweep.json')
+    if os.path.exists(sweep_path):
+        if read_json(sweep_path) != sweep:
+            raise ValueError("{} holds a different sweep: {}".format(directory, read_json(sweep_path)))
+    else:
+        save_checkpoint(sweep_path, sweep)
+    done_path = os.path.join(directory, 'done')
+    remove(done_path)
+
+    orders = iter(orders)
+    # Published orders not yet reported, with their shards
+    pending = deque()
+
+    def publish():
+        n = next(orders, None)
+        if n is None:
+            return
+        path = order_directory(directory, n)
+        shards_path = os.path.join(path, 'shards.json')
+        if not os.path.exists(shards_path):
+            os.makedirs(path, exist_ok=True)
+            save_checkpoint(shards_path, [[index, list(layout), count]
+                                          for index, layout, count in shard_starts(n, sweep['chunk_size'])])
+        pending.append((n, read_json(shards_path)))
+
+    publish()
+    results = {}
+    while pending:
+        n, shards = pending[0]
+        path = order_directory(directory, n)
+        summary_path = os.path.join(path, 'summary.json')
+        if os.path.exists(summary_path):
+            merged = read_json(summary_path)
+        else:
+            unclaimed = 0
+            for index, _, _ in shards:
+                if index in results:
+                    continue
+                result_path = os.path.join(path, '{}.json'.format(index))
+                if os.path.exists(result_path):
+                    results[index] = read_json(result_path)
+                    continue
+
+                lease_path = os.path.join(path, '{}.lease'.format(index))
+                try:
+                    idle = time.time() - os.stat(lease_path).st_mtime
+                except FileNotFoundError:
+                    unclaimed += 1
+                    continue
+                if idle > lease_seconds:
+                    remove(lease_path)
+                    unclaimed += 1
+
+            if len(results) < len(shards):
+                if unclaimed == 0 and len(pending) == 1:
+                    publish()
+                time.sleep(poll_seconds)
+                continue
+            merged = merge_results(results[index] for index, _, _ in shards)
+            save_checkpoint(summary_path, merged)
+
+        yield n, merged
+        pending.popleft()
+        results = {}
+        if not pending:
+            publish()
+
+    save_checkpoint(done_path, {'host': socket.gethostname(), 'pid': os.getpid()})
+
+
+def claim_shard(directory, shards, cursor, interval):
+    '''Claim the next shard of the shared sweep in directory that has no result and no
+    lease, looking at the orders with shards published but no summary, lowest first.
+    shards caches each order's shards, and cursor the position a worker has got to in
+    each, so that claiming a shard does not take a pass over all of them. Returns
+    (n, shard, lease), or None (and resets the cursor) if every shard is taken.'''
+    orders = sorted(int(name[len('order_'):]) for name in os.listdir(directory) if name.startswith('order_'))
+    for n in orders:
+        path = order_directory(directory, n)
+        if os.path.exists(os.path.join(path, 'summary.json')):
+            continue
+        if n not in shards:
+            try:
+                shards[n] = read_json(os.path.join(path, 'shards.json'))
+            except FileNotFoundError:
+                continue
+
+        for position in range(cursor.get(n, 0), len(shards[n])):
+            index = shards[n][position][0]
+            if os.path.exists(os.path.join(path, '{}.json'.format(index))):
+                continue
+            lease = Lease.claim(os.path.join(path, '{}.lease'.format(index)), interval)
+            if lease is not None:
+                cursor[n] = position + 1
+                return n, shards[n][position], lease
+        cursor[n] = len(shards[n])
+
+    # Shards whose leases expire are handed out again, so look at everything next time
+    cursor.clear()
+    return None
+
+
+def work(directory, alg, cache_path=None, lease_seconds=300, poll_seconds=POLL_SECONDS):
+    '''Burn shards of the shared sweep in directory until its coordinator has finished.
+    alg is the list of algorithms the worker was started with, which must be the
+    sweep's. Exact burning numbers are cached in cache_path, if given. Returns the
+    number of shards burned.'''
+    sweep_path = os.path.join(directory, 'sweep.json')
+    while not os.path.exists(sweep_path):
+        time.sleep(poll_seconds)
+    sweep = read_json(sweep_path)
+    if sweep['alg'] != alg:
+        raise ValueError("The sweep in {} is for algorithm {}, not {}".format(directory, ','.join(sweep['alg']),
+                                                                              ','.join(alg)))
+
+    shards, cursor = {}, {}
+    burned = 0
+    while True:
+        claimed = claim_shard(directory, shards, cursor, lease_seconds / 4)
+        if claimed is None:
+            if os.path.exists(os.path.join(directory, 'done')):
+                return burned
+            time.sleep(poll_seconds)
+            continue
+
+        n, (index, layout, count), lease = claimed
+        with lease:
+            result = burn_shard(sweep['alg'], n, index, count, layout, sweep['exact_check'], cache_path=cache_path,
+                                prune=sweep['prune'])
+            del result['profiles'], result['records'], result['summaries']
+            save_checkpoint(os.path.join(order_directory(directory, n), '{}.json'.format(index)), result)
+        burned += 1
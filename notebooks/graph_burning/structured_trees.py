@@ -0,0 +1,299 @@
+import heapq
+
+import numpy as np
+
+from .compact_tree import CompactTree
+from .lower_bounds import ceil_sqrt
+
+
+# Burning sequences built directly for trees of a few simple shapes, recognised in O(n)
+# from their degrees:
+#
+# - a path on n vertices has b = ceil(sqrt(n)), and an optimal sequence covers it with
+#   consecutive segments of 2r + 1 vertices, r = b - 1, ..., 0;
+# - a star (n >= 4) has b = 2: its centre, then anything;
+# - spiders (one vertex of degree >= 3) and caterpillars (a path once the leaves are
+#   removed) get a covering by balls of radii k - 1, ..., 0, found greedily (with a
+#   bounded search over the order of the radii for caterpillars).
+#
+# Burning is NP-hard even on spiders and on caterpillars of maximum degree 3 (Bessy et
+# al., 2017; Das et al., 2018), so these sequences are only returned when their length
+# meets a lower bound on b(T), which certifies them optimal. The closed forms
+# for paths and stars always are.
+
+
+def classify(tree):
+    '''Return the shape of a tree (CompactTree, TreeDistances or networkx graph): 'path',
+    'star', 'spider' (exactly one vertex of degree 3 or more), 'caterpillar' (the
+    vertices that are not leaves form a path) or None for any other tree. A tree is
+    given the first of these that fits it. O(n).'''
+    if not hasattr(tree, 'indptr'):
+        tree = CompactTree.from_networkx(tree)
+    n = tree.order()
+    degree = np.diff(tree.indptr)
+    if n <= 2 or degree.max() <= 2:
+        return 'path'
+    if degree.max() == n - 1:
+        return 'star'
+    if np.count_nonzero(degree >= 3) == 1:
+        return 'spider'
+
+    # Count each vertex's neighbours that are not leaves
+    inner = np.add.reduceat(degree[tree.indices] > 1, tree.indptr[:-1])
+    if (inner[degree > 1] <= 2).all():
+        return 'caterpillar'
+    return None
+
+
+def cover_path(length, k):
+    '''Return the positions (0 to length - 1) of the sources of a burning sequence of
+    length k for a path of the given length, None for sources it does not need, or None
+    if k sources are too few.'''
+    sources = []
+    start = 0
+    for radius in range(k - 1, -1, -1):
+        if start >= length:
+            sources.append(None)
+            continue
+        sources.append(min(start + radius, length - 1))
+        start += 2 * radius + 1
+    return sources if start >= length else None
+
+
+def _neighbour_sums(tree, within=None):
+    '''Return, for every vertex of a CompactTree on 2 or more vertices, the number and
+    the sum of its neighbours (only those in within, a boolean array, if given). Along a
+    path the next vertex is the sum less the previous vertex, so paths can be walked
+    vertex by vertex in Python (bfs_levels takes a numpy pass per level, which is slow
+    on long paths).'''
+    counted = np.ones(len(tree.indices), dtype=bool) if within is None else within[tree.indices]
+    starts = tree.indptr[:-1]
+    count = np.add.reduceat(counted.astype(np.int64), starts)
+    total = np.add.reduceat(np.where(counted, tree.indices, 0).astype(np.int64), starts)
+    return count.tolist(), total.tolist()
+
+
+def _walk(count, total, start, first):
+    '''Return the vertices along a path from start through its neighbour first, up to the
+    first vertex with fewer than two neighbours (count and total from _neighbour_sums).'''
+    vertices = [start]
+    previous, v = start, first
+    while True:
+        vertices.append(v)
+        if count[v] < 2:
+            return vertices
+        previous, v = v, total[v] - previous
+
+
+def path_vertices(tree):
+    '''Return the vertex indices of a path, from one end to the other.'''
+    if tree.order() < 2:
+        return list(range(tree.order()))
+    count, total = _neighbour_sums(tree)
+    start = count.index(1)
+    return _walk(count, total, start, total[start])
+
+
+def burn_path(tree):
+    '''Return an optimal burning sequence (vertex indices) for a path.'''
+    vertices = path_vertices(tree)
+    sources = cover_path(len(vertices), ceil_sqrt(len(vertices)))
+    return ['x' if position is None else vertices[position] for position in sources]
+
+
+def burn_star(tree):
+    '''Return an optimal burning sequence (vertex indices) for a star on 4 or more
+    vertices.'''
+    return [int(np.argmax(np.diff(tree.indptr))), 'x']
+
+
+def spider_legs(tree):
+    '''Return the centre of a spider and its legs, each a list of vertex indices from
+    the centre out.'''
+    count, total = _neighbour_sums(tree)
+    centre = int(np.argmax(count))
+    return centre, [_walk(count, total, centre, v)[1:]
+                    for v in tree.indices[tree.indptr[centre]:tree.indptr[centre + 1]].tolist()]
+
+
+def burn_spider(tree, k=None):
+    '''Return a burning sequence of length k (vertex indices) for a spider, or None if
+    the greedy covering fails. k defaults to the diameter bound, ceil(sqrt(d + 1)) where
+    d is the length of the two longest legs together.
+
+    One source goes to the centre, or along the longest leg from it, and covers every
+    leg up to some depth; the others cover the far ends of the legs, each given to the
+    leg with the most left uncovered. Every radius is tried for the centre, so this is
+    O(n + k^2 log(legs)).'''
+    centre, legs = spider_legs(tree)
+    if k is None:
+        longest = heapq.nlargest(2, map(len, legs))
+        k = ceil_sqrt(sum(longest) + 1)
+
+    for centre_radius in range(k - 1, -1, -1):
+        # Uncovered depths (negated, for the heap) of the legs
+        uncovered = [(-len(leg), i) for i, leg in enumerate(legs)]
+        heapq.heapify(uncovered)
+        sources = []
+        for radius in range(k - 1, -1, -1):
+            if radius == centre_radius:
+                sources.append(None)
+                continue
+            left, i = heapq.heappop(uncovered)
+            left = -left
+            if left == 0:
+                sources.append('x')
+            else:
+                sources.append(legs[i][max(left - radius, 1) - 1])
+            heapq.heappush(uncovered, (-max(left - 2 * radius - 1, 0), i))
+
+        # The centre source, at depth t along the leg with the most uncovered, covers it
+        # up to depth t + centre_radius and the others up to centre_radius - t
+        (first, i), (second, _) = heapq.nsmallest(2, uncovered)
+        first, second = -first, -second
+        if first + second > 2 * centre_radius:
+            continue
+        t = max(first - centre_radius, 0)
+        sources[k - 1 - centre_radius] = centre if t == 0 else legs[i][t - 1]
+        return sources
+    return None
+
+
+def caterpillar_spine(tree):
+    '''Return a longest path of a caterpillar (the vertices that are not leaves, and a
+    leaf at each end) as vertex indices, and for each of its vertices the number of
+    leaves hanging off it and one of them (-1 if none).'''
+    n = tree.order()
+    inner = np.diff(tree.indptr) > 1
+    inner_count, inner_total = _neighbour_sums(tree, inner)
+    leaf_count = (np.diff(tree.indptr) - inner_count).tolist()
+    starts = tree.indptr[:-1]
+    is_leaf = ~inner[tree.indices]
+    first_leaf = np.minimum.reduceat(np.where(is_leaf, tree.indices, n), starts).tolist()
+    last_leaf = np.maximum.reduceat(np.where(is_leaf, tree.indices, -1), starts).tolist()
+
+    start = next(v for v in np.flatnonzero(inner).tolist() if inner_count[v] == 1)
+    inner_path = _walk(inner_count, inner_total, start, inner_total[start])
+    first, last = inner_path[0], inner_path[-1]
+
+    # The last leaf of each end vertex extends the path at that end
+    vertices = [last_leaf[first]] + inner_path + [last_leaf[last]]
+    leaves = [0] + [leaf_count[v] for v in inner_path] + [0]
+    leaves[1] -= 1
+    leaves[-2] -= 1
+    leaf = [-1] + [first_leaf[v] if leaf_count[v] > 0 else -1 for v in inner_path] + [-1]
+    return vertices, leaves, leaf
+
+
+def _step(vertices, leaves, leaf, position, spine_left, radius):
+    '''Place a source of the given radius in a caterpillar sweep (see burn_caterpillar)
+    at the first spine position with anything uncovered. Returns the source and the
+    next such position with its spine_left flag, or None if the radius cannot finish
+    the position (radius 0 with several vertices left there).'''
+    last = len(vertices) - 1
+    if radius == 0:
+        # A single vertex: the spine vertex, or the only uncovered leaf
+        if spine_left and leaves[position] == 0:
+            return vertices[position], position + 1, True
+        if not spine_left and leaves[position] == 1:
+            return leaf[position], position + 1, True
+        return None
+
+    # A ball centred at spine position q covers the spine from q - radius to q + radius,
+    # and the leaves from q - radius + 1 to q + radius - 1
+    q = min(position + radius - (1 if leaves[position] else 0), last)
+    position = q + radius
+    if position <= last and leaves[position] == 0:
+        return vertices[q], position + 1, True
+    return vertices[q], position, False
+
+
+def burn_caterpillar(tree, k=None, budget=None):
+    '''Return a burning sequence of length k (vertex indices) for a caterpillar, or None
+    if none is found. k defaults to the diameter bound, ceil(sqrt(d + 1)) for a spine of
+    d + 1 vertices.
+
+    The sources are placed along a longest path (the spine) from one end, each as far
+    along as it can go while still covering the first vertex, spine vertex or leaf, left
+    uncovered; only the order of the radii along the spine is searched, largest first,
+    with failed states remembered. A ball of radius r covers at most 2r + 1 spine
+    vertices and reaches the leaves of at most 2r - 1 spine vertices, which cuts
+    branches whose radii are too few for what is left. The search gives up after budget
+    states (default n // k + 2k), each taking O(k), so this is O(n) in all (k is at
+    most about sqrt(n)).'''
+    vertices, leaves, leaf = caterpillar_spine(tree)
+    last = len(vertices) - 1
+    if k is None:
+        k = ceil_sqrt(len(vertices))
+    if budget is None:
+        budget = tree.order() // k + 2 * k
+
+    # leafy[p] is the number of spine vertices from position p on with leaves
+    leafy = np.cumsum(np.array(leaves[::-1]) > 0)[::-1].tolist() + [0]
+
+    # Depth first search over (position, spine_left, bitmask of radii left), with what
+    # the radii left can still cover and the sources placed so far
+    failed = set()
+    stack = [(0, True, (1 << k) - 1, k * k, k * k - 2 * k + 2, iter(range(k - 1, -1, -1)))]
+    placed = []
+    while stack:
+        position, spine_left, remaining, spine_capacity, leaf_capacity, radii = stack[-1]
+        radius = next((r for r in radii if remaining >> r & 1), None)
+        if radius is None:
+            failed.add((position, spine_left, remaining))
+            stack.pop()
+            if placed:
+                placed.pop()
+            continue
+
+        step = _step(vertices, leaves, leaf, position, spine_left, radius)
+        if step is None:
+            continue
+        source, next_position, next_spine_left = step
+        left = remaining & ~(1 << radius)
+        if next_position > last:
+            placed.append((radius, source))
+            sources = dict(placed)
+            return [sources.get(r, 'x') for r in range(k - 1, -1, -1)]
+
+        next_spine_capacity = spine_capacity - 2 * radius - 1
+        next_leaf_capacity = leaf_capacity - max(2 * radius - 1, 1)
+        if (last - next_position + next_spine_left > next_spine_capacity or leafy[next_position] > next_leaf_capacity
+                or (next_position, next_spine_left, left) in failed):
+            continue
+        budget -= 1
+        if budget < 0:
+            return None
+        placed.append((radius, source))
+        stack.append((next_position, next_spine_left, left, next_spine_capacity, next_leaf_capacity,
+                      iter(range(k - 1, -1, -1))))
+    return None
+
+
+def burn_structured(tree, lower=None):
+    '''Return (shape, sequence) for a tree (networkx graph or CompactTree): its shape as
+    given by classify, and an optimal burning sequence in the tree's vertex names, or
+    None if the tree has none of the shapes or its greedy sequence cannot be certified.
+
+    Spider and caterpillar sequences are certified by lower, a lower bound on b(T) (such
+    as lower_bounds.lower_bound, which the sweep computes anyway), or else the diameter
+    bound, which only takes O(n).'''
+    if not isinstance(tree, CompactTree):
+        tree = CompactTree.from_networkx(tree)
+    if tree.order() == 0:
+        return 'path', []
+
+    shape = classify(tree)
+    if shape == 'path':
+        sequence = burn_path(tree)
+    elif shape == 'star':
+        sequence = burn_star(tree)
+    elif shape in ('spider', 'caterpillar'):
+        sequence = (burn_spider if shape == 'spider' else burn_caterpillar)(tree, lower)
+    else:
+        sequence = None
+
+    if sequence is None:
+        return shape, None
+    nodes = tree.nodes()
+    return shape, [v if v == 'x' else nodes[v] for v in sequence]
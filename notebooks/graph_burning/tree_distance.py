@@ -0,0 +1,180 @@
+import numpy as np
+
+from .compact_tree import CompactTree, bfs_levels
+
+
+class TreeDistances:
+    '''Distance oracle for a tree, using O(n log n) integers instead of the n^2 entries
+    of shortest_path_lengths.
+
+    The tree is rooted at its first vertex and stored as CSR adjacency arrays plus a
+    binary lifting table of ancestors. Distances and ancestors are answered in
+    O(log n), neighbourhoods in time proportional to their size.
+    The tree is a networkx graph or a CompactTree; vertices are referred to by their
+    labels in the original graph.'''
+
+    __slots__ = ('nodes', 'index', 'indptr', 'indices', 'parent', 'depth', 'up', '_preorder')
+
+    def __init__(self, tree):
+        if not isinstance(tree, CompactTree):
+            tree = CompactTree.from_networkx(tree)
+        n = tree.order()
+
+        # Unlabelled trees use ranges, so vertex i is simply called i
+        if tree.labels is None:
+            self.nodes = range(n)
+            self.index = range(n)
+        else:
+            self.nodes = tree.labels
+            self.index = {node: i for i, node in enumerate(self.nodes)}
+
+        # CSR adjacency, keeping the neighbour order of the graph so that
+        # breadth first searches visit vertices in the same order as networkx
+        self.indptr = tree.indptr
+        self.indices = tree.indices
+
+        # Parent and depth of every vertex, rooted at vertex 0
+        _, parent, self.depth = bfs_levels(self.indptr, self.indices)
+        self.parent = np.where(parent < 0, np.arange(n, dtype=np.int32), parent)
+
+        # up[k][v] is the 2^k-th ancestor of v (the root is its own ancestor)
+        levels = max(1, int(self.depth.max(initial=0)).bit_length())
+        self.up = np.empty((levels, n), dtype=np.int32)
+        self.up[0] = self.parent
+        for k in range(1, levels):
+            self.up[k] = self.up[k - 1][self.up[k - 1]]
+        self._preorder = None
+
+    def order(self):
+        '''Return the number of vertices in the tree.'''
+        return len(self.nodes)
+
+    def _ancestor(self, v, k):
+        '''Return the kth ancestor (by index) of the vertex with index v.'''
+        level = 0
+        while k > 0:
+            if k & 1:
+                v = self.up[level][v]
+            k >>= 1
+            level += 1
+        return v
+
+    def _lca(self, u, v):
+        '''Return the index of the lowest common ancestor of two vertex indices.'''
+        if self.depth[u] < self.depth[v]:
+            u, v = v, u
+        u = self._ancestor(u, self.depth[u] - self.depth[v])
+        if u == v:
+            return u
+
+        for k in range(len(self.up) - 1, -1, -1):
+            if self.up[k][u] != self.up[k][v]:
+                u = self.up[k][u]
+                v = self.up[k][v]
+        return self.parent[u]
+
+    def lca(self, u, v):
+        '''Return the lowest common ancestor of u and v (the tree is rooted at its first vertex).'''
+        return self.nodes[self._lca(self.index[u], self.index[v])]
+
+    def dist(self, u, v):
+        '''Return the distance between vertices u and v.'''
+        i, j = self.index[u], self.index[v]
+        return int(self.depth[i] + self.depth[j] - 2 * self.depth[self._lca(i, j)])
+
+    def _walk(self, u, v, i):
+        '''Return the index of the vertex at distance i from index u towards index v.'''
+        w = self._lca(u, v)
+        up_length = self.depth[u] - self.depth[w]
+        down_length = self.depth[v] - self.depth[w]
+        if i < 0 or i > up_length + down_length:
+            raise RuntimeError("No ancestor found")
+
+        if i <= up_length:
+            return self._ancestor(u, i)
+        return self._ancestor(v, up_length + down_length - i)
+
+    def walk(self, source, target, i):
+        '''Return the vertex at distance i from source on the path towards target.
+        With target as the root, this is the ith ancestor of source.'''
+        return self.nodes[self._walk(self.index[source], self.index[target], i)]
+
+    def distances_from(self, source, indices=None):
+        '''Return a NumPy array with the distance from source to every vertex, indexed
+        like self.nodes, or to each vertex index in the array indices if given (all at
+        once, in O(len(indices) log n)).'''
+        if indices is None:
+            indices = np.arange(self.order())
+        return self._distances(self.index[source], indices)
+
+    def _distances(self, s, v):
+        '''Return the distances from index s to each index in the array v.'''
+        return self._pair_distances(np.full(len(v), s), v)
+
+    def _pair_distances(self, u, v):
+        '''Return the distances between index u[j] and index v[j] for each j.'''
+        u = np.asarray(u)
+        v = np.asarray(v)
+
+        # Vectorised version of _lca over all pairs at once
+        deeper = self.depth[v] > self.depth[u]
+        a = np.where(deeper, v, u)
+        b = np.where(deeper, u, v)
+        diff = self.depth[a] - self.depth[b]
+        for k in range(len(self.up)):
+            jump = (diff >> k) & 1 == 1
+            a = np.where(jump, self.up[k][a], a)
+        for k in range(len(self.up) - 1, -1, -1):
+            differ = self.up[k][a] != self.up[k][b]
+            a = np.where(differ, self.up[k][a], a)
+            b = np.where(differ, self.up[k][b], b)
+        lca = np.where(a == b, a, self.parent[a])
+
+        return self.depth[v] + self.depth[u] - 2 * self.depth[lca]
+
+    def preorder(self):
+        '''Return the position of every vertex (by index) in a depth first preorder of
+        the tree, so that every subtree occupies a contiguous range of positions.'''
+        if self._preorder is None:
+            n = self.order()
+            by_depth = np.argsort(self.depth, kind='stable')
+            bounds = np.searchsorted(self.depth[by_depth], np.arange(int(self.depth.max(initial=0)) + 2))
+            levels = [by_depth[bounds[d]:bounds[d + 1]] for d in range(1, len(bounds) - 1)]
+
+            # Subtree sizes, from the deepest level up
+            size = np.ones(n, dtype=np.int64)
+            for level in reversed(levels):
+                np.add.at(size, self.parent[level], size[level])
+
+            # Each child starts after its parent and the subtrees of its earlier siblings
+            preorder = np.zeros(n, dtype=np.int64)
+            for level in levels:
+                level = level[np.argsort(preorder[self.parent[level]], kind='stable')]
+                parents = self.parent[level]
+                before = np.cumsum(size[level]) - size[level]
+                first = np.flatnonzero(np.r_[True, parents[1:] != parents[:-1]])
+                group_start = np.repeat(before[first], np.diff(np.r_[first, len(level)]))
+                preorder[level] = preorder[parents] + 1 + before - group_start
+            self._preorder = preorder
+
+        return self._preorder
+
+    def bfs(self, source, radius=None, within=None):
+        '''Yield (vertex, distance) pairs in breadth first order from source, stopping
+        at the given radius. If within is given (any container of vertices, e.g. a
+        subtree as a networkx graph), the search is restricted to those vertices.'''
+        s = self.index[source]
+        dist = {s: 0}
+        queue = [s]
+        for u in queue:
+            yield self.nodes[u], dist[u]
+            if radius is not None and dist[u] >= radius:
+                continue
+            for w in self.indices[self.indptr[u]:self.indptr[u + 1]].tolist():
+                if w not in dist and (within is None or self.nodes[w] in within):
+                    dist[w] = dist[u] + 1
+                    queue.append(w)
+
+    def ball(self, source, radius, within=None):
+        '''Return the set of vertices within radius of source.'''
+        return set(node for node, _ in self.bfs(source, radius, within))
@@ -0,0 +1,182 @@
+import glob
+import math
+import os
+import numpy as np
+
+from .compact_tree import CompactTree
+
+
+# Generators for families of trees, all returning CompactTrees on vertices 0..n-1
+
+
+def path(n):
+    '''Return the path 0 - 1 - ... - (n-1).'''
+    return CompactTree.from_parents(np.arange(-1, n - 1))
+
+
+def star(n):
+    '''Return the star with centre 0 and n - 1 leaves.'''
+    parent = np.zeros(n, dtype=np.int32)
+    parent[:1] = -1
+    return CompactTree.from_parents(parent)
+
+
+def spider(legs, length):
+    '''Return the spider with the given number of legs, each a path of the given length
+    hanging off the centre 0.'''
+    n = 1 + legs * length
+    parent = np.arange(-1, n - 1)
+
+    # The first vertex of each leg hangs off the centre instead of the previous leg
+    parent[1::length] = 0
+    return CompactTree.from_parents(parent)
+
+
+def caterpillar(spine, legs):
+    '''Return the caterpillar with a spine path of the given length, where every spine
+    vertex has the given number of leaves attached.'''
+    parent = np.concatenate((np.arange(-1, spine - 1), np.repeat(np.arange(spine), legs)))
+    return CompactTree.from_parents(parent)
+
+
+def complete_kary(n, k=2):
+    '''Return the complete k-ary tree on n vertices (filled level by level).'''
+    parent = (np.arange(n) - 1) // k
+    parent[:1] = -1
+    return CompactTree.from_parents(parent)
+
+
+def prufer_tree(sequence, n=None):
+    '''Return the tree with the given Prufer sequence (of length n - 2).'''
+    n = len(sequence) + 2 if n is None else n
+    if n <= 2:
+        return path(n)
+
+    sequence = np.asarray(sequence, dtype=np.int64)
+    degree = (np.bincount(sequence, minlength=n) + 1).tolist()
+
+    # Repeatedly join the smallest leaf to the next vertex of the sequence, which is its
+    # parent when rooted at n - 1. A vertex that becomes a leaf is the smallest leaf if
+    # it is below the scan position; otherwise the scan will reach it later.
+    parent = [-1] * n
+    scan = degree.index(1)
+    leaf = scan
+    for v in sequence.tolist():
+        parent[leaf] = v
+        degree[v] -= 1
+        if degree[v] == 1 and v < scan:
+            leaf = v
+        else:
+            scan += 1
+            while degree[scan] != 1:
+                scan += 1
+            leaf = scan
+    parent[leaf] = n - 1
+    return CompactTree.from_parents(parent)
+
+
+def random_prufer(n, rng=None):
+    '''Return a uniformly random labelled tree on n vertices.'''
+    rng = np.random.default_rng(rng)
+    return prufer_tree(rng.integers(0, n, max(n - 2, 0)), n)
+
+
+def random_recursive(n, rng=None):
+    '''Return a random recursive tree: vertex i joins a uniformly random earlier vertex.'''
+    rng = np.random.default_rng(rng)
+    parent = np.empty(n, dtype=np.int64)
+    parent[:1] = -1
+    parent[1:] = rng.random(max(n - 1, 0)) * np.arange(1, n)
+    return CompactTree.from_parents(parent)
+
+
+def preferential_attachment(n, rng=None):
+    '''Return a random preferential attachment (Barabasi-Albert) tree: vertex i joins an
+    earlier vertex with probability proportional to its degree.
+
+    Picking a uniformly random end of a uniformly random earlier edge picks a vertex in
+    proportion to its degree. The edge of vertex k is (k, parent[k]), so vertex i either
+    joins k directly or joins parent[k], which may itself be such a reference; these
+    chains are followed by pointer jumping, O(log n) array passes in all.'''
+    rng = np.random.default_rng(rng)
+    parent = np.zeros(n, dtype=np.int64)
+    parent[:1] = -1
+    if n <= 2:
+        return CompactTree.from_parents(parent)
+
+    # Vertex i >= 2 picks one of the 2 (i - 1) ends of the edges of vertices 1..i-1
+    i = np.arange(2, n)
+    end = (rng.random(n - 2) * 2 * (i - 1)).astype(np.int64)
+    parent[2:] = end // 2 + 1
+
+    # Where the far end was picked, the parent is the parent of that vertex
+    refers = np.zeros(n, dtype=bool)
+    refers[2:] = end % 2 == 1
+    while refers.any():
+        follow = np.flatnonzero(refers)
+        target = parent[follow]
+        parent[follow] = parent[target]
+        refers[follow] = refers[target]
+    return CompactTree.from_parents(parent)
+
+
+def random_caterpillar(n, rng=None):
+    '''Return a random caterpillar on n vertices: a spine of uniformly random length,
+    with each remaining vertex a leaf on a uniformly random spine vertex.'''
+    rng = np.random.default_rng(rng)
+    spine = int(rng.integers(1, n + 1)) if n > 0 else 0
+    return CompactTree.from_parents(np.concatenate((np.arange(-1, spine - 1),
+                                                    rng.integers(0, max(spine, 1), n - spine))))
+
+
+def random_spider(n, rng=None):
+    '''Return a random spider on n vertices: the legs hanging off the centre 0 have the
+    lengths of a random composition of n - 1 (each vertex after the first starts a new
+    leg with the same, uniformly random, probability).'''
+    rng = np.random.default_rng(rng)
+    parent = np.arange(-1, n - 1)
+    starts = np.flatnonzero(rng.random(n) < rng.random())
+    parent[starts[starts > 1]] = 0
+    return CompactTree.from_parents(parent)
+
+
+# Each family makes a tree of (roughly) n vertices from n and a random generator
+FAMILIES = {
+    'path': lambda n, rng: path(n),
+    'star': lambda n, rng: star(n),
+    'spider': lambda n, rng: spider(max(1, math.isqrt(n)), max(1, (n - 1) // max(1, math.isqrt(n)))),
+    'caterpillar': lambda n, rng: caterpillar(max(1, n // 3), 2),
+    'prufer': lambda n, rng: random_prufer(n, rng),
+    'binary': lambda n, rng: complete_kary(n, 2),
+    'ternary': lambda n, rng: complete_kary(n, 3),
+    'recursive': lambda n, rng: random_recursive(n, rng),
+    'preferential': lambda n, rng: preferential_attachment(n, rng),
+    'random_caterpillar': lambda n, rng: random_caterpillar(n, rng),
+    'random_spider': lambda n, rng: random_spider(n, rng),
+}
+
+# The families with exactly n vertices that differ from one draw to the next
+RANDOM_FAMILIES = ['prufer', 'recursive', 'preferential', 'random_caterpillar', 'random_spider']
+
+
+def family_tree(family, n, rng=None):
+    '''Return a tree with about n vertices from one of the FAMILIES. rng is a seed or
+    a numpy Generator.'''
+    if family not in FAMILIES:
+        raise ValueError("Unknown tree family {} (expected one of {})".format(family, ', '.join(FAMILIES)))
+    return FAMILIES[family](n, np.random.default_rng(rng))
+
+
+# The trees directory of the repository, wherever the scripts are run from
+TREES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'trees')
+
+
+def fixture_trees(directory=TREES_DIRECTORY):
+    '''Yield (name, tree) for every .mat file in the trees directory. Raises
+    FileNotFoundError if there is no such directory.'''
+    from .graph_utils import load_tree
+
+    if not os.path.isdir(directory):
+        raise FileNotFoundError("No trees directory at {}".format(os.path.normpath(directory)))
+    for filepath in sorted(glob.glob(os.path.join(directory, '*.mat'))):
+        yield os.path.splitext(os.path.basename(filepath))[0], load_tree(filepath)
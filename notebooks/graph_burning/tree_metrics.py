@@ -0,0 +1,63 @@
+import numpy as np
+
+from .compact_tree import CompactTree, bfs_levels
+
+
+def _csr(tree):
+    '''Return the CSR adjacency arrays of a CompactTree, TreeDistances or networkx tree.'''
+    if not hasattr(tree, 'indptr'):
+        tree = CompactTree.from_networkx(tree)
+    return tree.indptr, tree.indices
+
+
+def _farthest(dist, within):
+    '''Return the vertex of within (a boolean mask, or None for all) farthest away
+    according to dist, the first one by index if there are several.'''
+    if within is not None:
+        dist = np.where(within, dist, -1)
+    return int(np.argmax(dist))
+
+
+def _diameter(indptr, indices, within):
+    '''Return the two ends a, b of a longest path between vertices of within, and the
+    distances from a and from b to every vertex.
+
+    In a tree, the vertex of a set farthest from any vertex is an end of a longest
+    path within the set, and the other end is the vertex of the set farthest from it.'''
+    start = 0 if within is None else int(np.argmax(within))
+    a = _farthest(bfs_levels(indptr, indices, root=start)[2], within)
+    dist_a = bfs_levels(indptr, indices, root=a)[2]
+    b = _farthest(dist_a, within)
+    dist_b = bfs_levels(indptr, indices, root=b)[2]
+    return a, b, dist_a, dist_b
+
+
+def diameter(tree, within=None):
+    '''Return (a, b, length) for a longest path of the tree (networkx graph, CompactTree
+    or TreeDistances), with ends given by vertex index. If within is a boolean mask over
+    the vertices, only paths between vertices of within are considered. O(n).'''
+    indptr, indices = _csr(tree)
+    a, b, dist_a, _ = _diameter(indptr, indices, within)
+    return a, b, int(dist_a[b])
+
+
+def eccentricities(tree, within=None):
+    '''Return an array with the eccentricity of every vertex, indexed like the vertices
+    of the tree: its distance to the farthest vertex, or to the farthest vertex of
+    within if that boolean mask is given.
+
+    In a tree, the farthest vertex from anywhere is one of the two ends of a diameter,
+    so three breadth first searches give all eccentricities in O(n).'''
+    indptr, indices = _csr(tree)
+    _, _, dist_a, dist_b = _diameter(indptr, indices, within)
+    return np.maximum(dist_a, dist_b)
+
+
+def centres(tree, within=None):
+    '''Return the vertex indices of minimum eccentricity, in increasing order: the one
+    or two centres of the tree, or, if within is given, the vertices of within of
+    minimum eccentricity with respect to within.'''
+    eccentricity = eccentricities(tree, within)
+    if within is not None:
+        eccentricity = np.where(within, eccentricity, np.iinfo(eccentricity.dtype).max)
+    return np.flatnonzero(eccentricity == eccentricity.min()).tolist()
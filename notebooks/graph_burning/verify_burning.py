@@ -0,0 +1,71 @@
+import numpy as np
+
+from .compact_tree import CompactTree, gather_neighbours
+
+
+def adjacency(graph):
+    '''Return (indptr, indices, nodes, index) for a networkx graph or CompactTree: CSR
+    adjacency arrays, the vertex names, and a map from names to positions. Works for
+    any graph, not just trees.'''
+    if isinstance(graph, CompactTree):
+        nodes = graph.nodes()
+        index = range(len(nodes)) if graph.labels is None else {node: i for i, node in enumerate(nodes)}
+        return graph.indptr, graph.indices, nodes, index
+
+    nodes = list(graph.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+    indices = []
+    for i, node in enumerate(nodes):
+        indices.extend(index[v] for v in graph.adj[node])
+        indptr[i + 1] = len(indices)
+    return indptr, np.asarray(indices, dtype=np.int32), nodes, index
+
+
+def burn_radii(indptr, indices, sources, radii, alive=None):
+    '''Multi-source BFS where the fire started at sources[j] spreads radii[j] steps.
+    Returns, for every vertex, the largest number of steps the fire still has left when
+    it gets there (-1 if it never does). If alive (a boolean array) is given, the fire
+    only spreads through alive vertices.
+
+    Levels are processed from the largest radius down, so each vertex is expanded at
+    most once, with its final value: O(n + m) for the whole sequence.'''
+    n = len(indptr) - 1
+    left = np.full(n, -1, dtype=np.int32)
+    sources = np.asarray(sources, dtype=np.int32)
+    radii = np.asarray(radii, dtype=np.int32)
+    if len(sources) == 0:
+        return left
+    np.maximum.at(left, sources, radii)
+
+    frontier = np.zeros(0, dtype=np.int32)
+    for r in range(int(radii.max()), 0, -1):
+        # Vertices with r steps left: sources started with radius r, or reached last level
+        started = sources[radii == r]
+        frontier = np.unique(np.concatenate((frontier, started[left[started] == r])))
+
+        neighbours, _ = gather_neighbours(indptr, indices, frontier)
+        reached = left[neighbours] < r - 1
+        if alive is not None:
+            reached &= alive[neighbours]
+        frontier = np.unique(neighbours[reached])
+        left[frontier] = r - 1
+
+    return left
+
+
+def verify_burning_sequence(graph, burning_sequence):
+    '''Check that a burning sequence burns the whole graph (networkx graph or CompactTree).
+    The ith source of a sequence of length k burns everything within k - 1 - i of it;
+    'x' entries are ignored. Returns the vertices that never burn, so an empty list
+    means the sequence is good (and len(burning_sequence) is an upper bound on the
+    burning number).'''
+    indptr, indices, nodes, index = adjacency(graph)
+    k = len(burning_sequence)
+    sources = [(index[source], k - 1 - i) for i, source in enumerate(burning_sequence) if source != 'x']
+    if not sources:
+        return list(nodes)
+
+    sources, radii = zip(*sources)
+    left = burn_radii(indptr, indices, sources, radii)
+    return [nodes[v] for v in np.flatnonzero(left < 0)]
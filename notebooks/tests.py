@@ -1,7 +1,39 @@
+import io
+import os
+import sys
+import json
+import contextlib
+import tempfile
+import subprocess
+import threading
+import time
 import unittest
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
 
 import networkx as nx
-from burn_tree import *
+import numpy as np
+from graph_burning.burn_tree import *
+from graph_burning.graph_utils import create_adj_mat, load_tree, save_tree, sniff_format
+from graph_burning.tree_distance import TreeDistances
+from graph_burning.burning_state import BurningState
+from graph_burning.compact_tree import CompactTree
+from graph_burning.free_trees import *
+from graph_burning.exact_burning import burning_number, ExactBurner
+from graph_burning.verify_burning import adjacency, verify_burning_sequence
+from graph_burning.tree_families import *
+from graph_burning.instrumentation import Collector
+from graph_burning.result_store import ResultStore, make_record, tree_from_code
+from graph_burning.canonical import canonical_form
+from graph_burning.tree_metrics import centres, diameter, eccentricities
+from graph_burning.burning_cache import BurningCache
+from graph_burning import benchmark, burn_all_trees
+from graph_burning.burning_service import burn_request, tree_request, worker_context
+from graph_burning.graphs import burn_graph, graph_bfs, minimum_diameter_spanning_tree
+from graph_burning.lower_bounds import diameter_bound, lower_bound, packing
+from graph_burning.structured_trees import burn_structured, classify
+from graph_burning.shared_sweep import Lease, coordinate, work
+from graph_burning.incremental import SummaryStore, derive_sequence, neighbour_lists, tree_code
 
 
 class TestBurningMethods(unittest.TestCase):
@@ -110,7 +142,1020 @@ class TestBurningMethods(unittest.TestCase):
         self.assertTrue(is_bridge(tree, 1))
         self.assertFalse(is_bridge(tree, 2))
         self.assertFalse(is_bridge(tree, 3))
+    
+    def test_remove_nhood(self):
+        # Spider with legs 1-2, 3-4 and 5 around vertex 0
+        tree = nx.Graph()
+        edge_list = [(0, 1), (1, 2), (0, 3), (3, 4), (0, 5)]
+        tree.add_edges_from(edge_list)
+        
+        reduced = remove_nhood(tree, set([0, 1, 2, 3]))
+        self.assertEqual(set(reduced), set([0, 3, 4, 5]))
+        self.assertEqual(tree.order(), 6)
+        self.assertEqual(remove_nhood(tree, set([0, 1, 2, 3]), dry_run=True), 2)
+        
+        # Everything can go if the whole tree is in the neighbourhood
+        self.assertEqual(remove_nhood(tree, set(tree), dry_run=True), 6)
+    
+    def test_burn_tree_using_centers(self):
+        # Path 0-5-2-9, whose centres are 5 and 2: the smaller is the first root, whatever
+        # order the graph has its vertices in
+        for nodes in [[5, 9, 2, 0], [0, 2, 9, 5], [2, 0, 5, 9]]:
+            tree = nx.Graph()
+            tree.add_nodes_from(nodes)
+            tree.add_edges_from([(0, 5), (5, 2), (2, 9)])
+            self.assertEqual(burn_tree_using_centers(tree), [2, 0])
+        
+        tree = nx.relabel_nodes(tree, {0: 'd', 5: 'c', 2: 'a', 9: 'b'})
+        self.assertEqual(burn_tree_using_centers(tree), ['a', 'd'])
+    
+    def test_baseline_sequences(self):
+        # Every tree of order 2 to 10 gets the sequences the original networkx
+        # implementations gave it, ties and all
+        with open('../trees/baseline_sequences.json', 'r') as file:
+            expected = json.load(file)
+        for entry in expected:
+            tree = nx.Graph()
+            tree.add_nodes_from(entry['nodes'])
+            tree.add_edges_from(entry['edges'])
+            for alg in ['frl', 'rrl', 'md', 'rrr']:
+                self.assertEqual(burn_all_trees.burn(tree, alg), entry[alg], (alg, entry['edges']))
+            
+
+class TestTreeDistances(unittest.TestCase):
+    
+    def test_dist_matches_shortest_paths(self):
+        tree = nx.random_labeled_tree(60, seed=3)
+        distances = TreeDistances(tree)
+        node_distances = shortest_path_lengths(tree)
+        
+        for u in tree:
+            for v in tree:
+                self.assertEqual(distances.dist(u, v), node_distances[u][v])
+            self.assertEqual(list(distances.distances_from(u)),
+                             [node_distances[u][v] for v in distances.nodes])
+            some = np.array([5, 0, 59, 5])
+            self.assertEqual(list(distances.distances_from(u, some)),
+                             [node_distances[u][distances.nodes[v]] for v in some])
+    
+    def test_walk(self):
+        # Path on five nodes: 0-1-2-3-4
+        tree = nx.path_graph(5)
+        distances = TreeDistances(tree)
+        
+        self.assertEqual(distances.walk(4, 0, 1), 3)
+        self.assertEqual(distances.walk(0, 4, 3), 3)
+        self.assertEqual(distances.walk(2, 2, 0), 2)
+        self.assertEqual(get_i_ancestor(distances, 4, 1, 2), 2)
+        
+        with self.assertRaises(RuntimeError):
+            distances.walk(0, 2, 3)
+    
+    def test_ball_within_subtree(self):
+        tree = nx.path_graph(5)
+        distances = TreeDistances(tree)
+        
+        self.assertEqual(distances.ball(2, 1), set([1, 2, 3]))
+        
+        subtree = tree.subgraph([0, 1, 2])
+        self.assertEqual(get_neighbourhood(subtree, 1, 5, node_distances=distances), set([0, 1, 2]))
+            
+
+class TestBurningState(unittest.TestCase):
+    
+    def test_remove_nhood(self):
+        # Path on five nodes: 0-1-2-3-4
+        tree = nx.path_graph(5)
+        state = BurningState(tree)
+        
+        # Vertex 1 can only go once 0 is gone, and 3 must stay to keep 4 connected
+        self.assertEqual(state.remove_nhood([1, 0, 3]), 2)
+        self.assertEqual(state.nodes(), [2, 3, 4])
+        self.assertEqual(state.get_leaves(), [2, 4])
+        self.assertEqual(state.remove_nhood([2, 3, 4], dry_run=True), 3)
+        self.assertEqual(state.order(), 3)
+        self.assertFalse(hasattr(state, '__dict__'))
+        self.assertEqual(state.remove_nhood([2, 3, 4]), 3)
+        self.assertEqual(state.order(), 0)
+    
+    def test_centre_and_diameter_follow_removals(self):
+        tree = nx.random_labeled_tree(40, seed=7)
+        state = BurningState(tree)
+        residual = tree.copy()
+        
+        while residual.order() > 0:
+            eccens = nx.eccentricity(residual)
+            self.assertEqual(state.centre(), min(eccens, key=eccens.get))
+            self.assertEqual(state.diameter()[2], max(eccens.values()))
+            self.assertEqual(state.get_leaves(), get_leaves(residual))
+            
+            leaf = get_leaves(residual)[-1]
+            state.remove(leaf)
+            residual.remove_node(leaf)
+    
+    def test_score_balls(self):
+        tree = nx.random_labeled_tree(60, seed=3)
+        state = BurningState(tree)
+        state.remove_nhood(get_neighbourhood(tree, 0, 2))
+        
+        leaves = state.leaf_mask()
+        near = state.near(np.flatnonzero(leaves), 1)
+        self.assertEqual(set(near.tolist()),
+                         set().union(*[state.distances.ball(leaf, 1, within=state) for leaf in state.get_leaves()]))
+        
+        for radius in range(4):
+            num_leaves, num_removed = state.score_balls(near, radius, leaves, budget=50)
+            for v, expected_leaves, expected_removed in zip(near, num_leaves, num_removed):
+                nhood = state.distances.ball(v, radius, within=state)
+                self.assertEqual(expected_leaves, sum(leaves[u] for u in nhood))
+                self.assertEqual(expected_removed, state.remove_nhood(nhood, dry_run=True))
+    
+    def test_balls(self):
+        tree = nx.random_labeled_tree(60, seed=3)
+        state = BurningState(tree)
+        state.remove_nhood(get_neighbourhood(tree, 0, 2))
+        
+        centres = np.flatnonzero(state.alive)
+        for radius in range(4):
+            balls = list(state.balls(centres, radius, budget=50))
+            self.assertEqual(len(balls), len(centres))
+            for v, ball in zip(centres, balls):
+                self.assertEqual([state.distances.nodes[u] for u in ball],
+                                 [node for node, _ in state.distances.bfs(v, radius, within=state)])
+    
+
+class TestCompactTree(unittest.TestCase):
+    
+    def test_from_edges(self):
+        tree = CompactTree.from_edges(4, [(0, 1), (2, 1), (1, 3)])
+        
+        self.assertEqual(tree.order(), 4)
+        self.assertEqual(list(tree.neighbours(1)), [0, 2, 3])
+        self.assertEqual(list(tree.parent), [-1, 0, 1, 1])
+        
+        with self.assertRaises(ValueError):
+            CompactTree.from_edges(4, [(0, 1)])
+    
+    def test_from_mat_file(self):
+        tree = CompactTree.from_mat_file('../trees/cross.mat')
+        graph = nx.from_numpy_array(create_adj_mat('../trees/cross.mat'))
+        
+        self.assertEqual(tree.order(), graph.order())
+        self.assertEqual(set(map(frozenset, tree.edges())), set(map(frozenset, graph.edges())))
+    
+    def test_labels_round_trip(self):
+        graph = nx.Graph([('a', 'b'), ('b', 'c'), ('b', 'd')])
+        tree = CompactTree.from_networkx(graph)
+        
+        self.assertEqual(tree.labels, ['a', 'b', 'c', 'd'])
+        self.assertEqual(set(tree.to_networkx().edges()), set(graph.edges()))
+    
+    def test_heuristics_accept_compact_tree(self):
+        graph = nx.random_labeled_tree(50, seed=11)
+        tree = CompactTree.from_networkx(graph)
+        
+        self.assertEqual(burn_tree(tree), burn_tree(graph))
+        self.assertEqual(burn_most_leaves_reroot(tree), burn_most_leaves_reroot(graph))
+        self.assertEqual(burn_most_removed(tree), burn_most_removed(graph))
+            
+
+class TestFreeTrees(unittest.TestCase):
+    
+    def test_matches_networkx(self):
+        for n in range(2, 11):
+            trees = [CompactTree.from_parents(parent) for parent in free_trees(n)]
+            expected = list(nx.nonisomorphic_trees(n))
+            
+            self.assertEqual(len(trees), count_free_trees(n))
+            self.assertEqual(len(trees), len(expected))
+            for tree, graph in zip(trees, expected):
+                self.assertEqual(set(map(frozenset, tree.edges())), set(map(frozenset, graph.edges())))
+    
+    def test_count_free_trees(self):
+        counts = [count_free_trees(n) for n in range(1, 21)]
+        self.assertEqual(counts[:10], [1, 1, 1, 2, 3, 6, 11, 23, 47, 106])
+        self.assertEqual(counts[19], 823065)
+    
+    def test_shards_cover_enumeration(self):
+        n = 11
+        everything = [list(parent) for parent in free_trees(n)]
+        
+        shards = []
+        for shard in range(4):
+            start, stop = shard_range(n, shard, 4)
+            shards.extend(list(parent) for parent in free_trees(n, start, stop - start))
+        self.assertEqual(shards, everything)
+        
+        shards = []
+        for start, layout, count in shard_starts(n, 10):
+            shards.extend(list(parent) for parent in free_trees(n, start, count, start_layout=layout))
+        self.assertEqual(shards, everything)
+            
+
+class TestExactBurning(unittest.TestCase):
+    
+    def assertBurns(self, graph, burning_sequence):
+        # Each source must be unburned when chosen, and the fire must reach everything
+        burned = set()
+        for i, source in enumerate(burning_sequence):
+            burned = set().union(*[nx.single_source_shortest_path_length(graph, s, cutoff=i - j).keys()
+                                   for j, s in enumerate(burning_sequence[:i]) if s != 'x'])
+            if source == 'x':
+                self.assertEqual(burned, set(graph.nodes()))
+            else:
+                self.assertNotIn(source, burned)
+        k = len(burning_sequence)
+        burned = set().union(*[nx.single_source_shortest_path_length(graph, s, cutoff=k - 1 - j).keys()
+                               for j, s in enumerate(burning_sequence) if s != 'x'])
+        self.assertEqual(burned, set(graph.nodes()))
+    
+    def test_paths(self):
+        for n in range(1, 27):
+            graph = nx.path_graph(n)
+            k, burning_sequence = burning_number(graph)
+            
+            self.assertEqual(k, math.ceil(math.sqrt(n)))
+            self.assertEqual(len(burning_sequence), k)
+            self.assertBurns(graph, burning_sequence)
+    
+    def test_stars(self):
+        for m in range(2, 10):
+            graph = nx.star_graph(m)
+            k, burning_sequence = burning_number(graph)
+            
+            self.assertEqual(k, 2)
+            self.assertBurns(graph, burning_sequence)
+    
+    def test_never_worse_than_max_depth(self):
+        for n in range(2, 10):
+            for graph in nx.nonisomorphic_trees(n):
+                k, burning_sequence = burning_number(graph)
+                
+                self.assertLessEqual(k, math.ceil(math.sqrt(n)))
+                self.assertLessEqual(k, len(burn_tree(graph)[0]))
+                self.assertBurns(graph, burning_sequence)
+    
+    def test_spider(self):
+        # Three legs of length 4 around a centre: the diameter (8) allows 3 rounds, but
+        # the 13 vertices need 4
+        graph = nx.Graph()
+        for leg in range(3):
+            nx.add_path(graph, ['c'] + [(leg, i) for i in range(1, 5)])
+        k, burning_sequence = burning_number(graph)
+        
+        self.assertEqual(ExactBurner(graph).lower_bound(), 3)
+        self.assertEqual(k, 4)
+        self.assertBurns(graph, burning_sequence)
+    
+    def test_compact_tree(self):
+        tree = CompactTree.from_mat_file('../trees/cross.mat')
+        self.assertEqual(burning_number(tree)[0], burning_number(tree.to_networkx())[0])
+            
+
+class TestVerifyBurning(unittest.TestCase):
+    
+    def test_path(self):
+        graph = nx.path_graph(9)
+        
+        self.assertEqual(verify_burning_sequence(graph, [2, 7, 'x']), [5])
+        self.assertEqual(verify_burning_sequence(graph, [2, 6, 8]), [])
+        self.assertEqual(verify_burning_sequence(graph, ['x', 'x']), list(range(9)))
+    
+    def test_matches_networkx(self):
+        for n in range(2, 10):
+            for graph in nx.nonisomorphic_trees(n):
+                tree = CompactTree.from_networkx(graph)
+                for burning_sequence in [burn_tree(graph)[0], burn_most_leaves_reroot(graph),
+                                         burn_most_leaves_fixed_root(graph), burn_most_removed(graph)]:
+                    k = len(burning_sequence)
+                    burned = set().union(*[nx.single_source_shortest_path_length(graph, s, cutoff=k - 1 - i).keys()
+                                           for i, s in enumerate(burning_sequence) if s != 'x'])
+                    uncovered = sorted(set(graph.nodes()) - burned)
+                    
+                    self.assertEqual(sorted(verify_burning_sequence(graph, burning_sequence)), uncovered)
+                    self.assertEqual(sorted(verify_burning_sequence(tree, burning_sequence)), uncovered)
+    
+    def test_general_graph(self):
+        graph = nx.cycle_graph(10)
+        
+        self.assertEqual(verify_burning_sequence(graph, [0, 5, 'x']), [3, 7])
+        self.assertEqual(verify_burning_sequence(graph, [0, 6, 'x', 'x']), [])
+            
+
+class TestLoadTree(unittest.TestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+    
+    def test_dense_matrices(self):
+        for name in ['cross', 'ethane', 'fork', 'graph_156']:
+            path = '../trees/{}.mat'.format(name)
+            tree = load_tree(path)
+            expected = CompactTree.from_adjacency_matrix(create_adj_mat(path))
+            
+            self.assertEqual(sniff_format(path), 'dense')
+            self.assertEqual(tree.indptr.tolist(), expected.indptr.tolist())
+            self.assertEqual(tree.indices.tolist(), expected.indices.tolist())
+        
+        self.assertEqual(sniff_format(self.write('edge.mat', '0 1\n1 0\n')), 'dense')
+        
+        # A damaged row is an error, not a short row
+        for text in ['0 1 0\n1 0 1\n0 1 x\n', '0 1 0\n1 0 1\n0 1\n', '0 1 0\n1 0 1\n']:
+            with self.assertRaises(ValueError):
+                load_tree(self.write('bad.mat', text))
+    
+    def test_edge_list(self):
+        path = self.write('spider.txt', '# a spider\n10 11\n11 12\n\n10 13\n13 14\n')
+        tree = load_tree(path)
+        
+        self.assertEqual(sniff_format(path), 'edges')
+        self.assertEqual(tree.labels, [10, 11, 12, 13, 14])
+        self.assertEqual(set(map(frozenset, tree.edges())),
+                         {frozenset(edge) for edge in [(10, 11), (11, 12), (10, 13), (13, 14)]})
+        
+        for text in ['0 1\n1 2 3\n', '0 1 2\n3\n', '0 1\n1 x\n', '0 1\n1 2.5\n']:
+            with self.assertRaises(ValueError):
+                load_tree(self.write('bad.txt', text))
+    
+    def test_parent_array(self):
+        tree = CompactTree.from_networkx(nx.random_labeled_tree(50, seed=4))
+        path = os.path.join(self.directory.name, 'tree.npy')
+        np.save(path, tree.parent)
+        loaded = load_tree(path)
+        
+        self.assertEqual(set(map(frozenset, loaded.edges())), set(map(frozenset, tree.edges())))
+    
+    def test_saved_tree(self):
+        # Shuffled vertex and neighbour orders (so the vertices have labels) must survive
+        rng = np.random.default_rng(11)
+        path = os.path.join(self.directory.name, 'tree')
+        for seed in range(30):
+            graph = nx.random_labeled_tree(int(rng.integers(1, 60)), seed=seed)
+            nodes = rng.permutation(graph.order()).tolist()
+            edges = [tuple(edge) for edge in rng.permutation(list(graph.edges()))]
+            graph = nx.Graph()
+            graph.add_nodes_from(nodes)
+            graph.add_edges_from(edges)
+            tree = CompactTree.from_networkx(graph)
+            
+            save_tree(path, tree)
+            loaded = load_tree(path)
+            
+            for name in ['indptr', 'indices', 'parent']:
+                self.assertIsInstance(getattr(loaded, name), np.memmap)
+                self.assertEqual(getattr(loaded, name).tolist(), getattr(tree, name).tolist())
+            self.assertEqual(loaded.labels, tree.labels)
+            for alg in ['frl', 'rrl', 'md', 'rrr']:
+                self.assertEqual(burn_all_trees.burn(loaded, alg), burn_all_trees.burn(tree, alg))
+        
+        # Saving over a loaded tree leaves it as it was
+        tree = CompactTree.from_networkx(nx.relabel_nodes(nx.path_graph(4), {v: 'v{}'.format(v) for v in range(4)}))
+        save_tree(path, tree)
+        self.assertEqual(load_tree(path).edges(), tree.edges())
+        self.assertEqual(loaded.labels, nodes)
+        self.assertEqual(loaded.parent.tolist().count(-1), 1)
+        save_tree(path, CompactTree.from_networkx(nx.path_graph(3)))
+        self.assertIsNone(load_tree(path).labels)
             
 
+def nx_parents(graph):
+    '''Return the parent of every vertex of a networkx tree on 0..n-1 rooted at 0.'''
+    parent = [-1] * graph.order()
+    for u, v in nx.bfs_edges(graph, 0):
+        parent[v] = u
+    return parent
+
+
+class TestTreeFamilies(unittest.TestCase):
+    
+    def assertIsomorphic(self, tree, graph):
+        self.assertTrue(nx.is_isomorphic(tree.to_networkx(), graph))
+    
+    def test_families(self):
+        self.assertIsomorphic(path(7), nx.path_graph(7))
+        self.assertIsomorphic(star(6), nx.star_graph(5))
+        self.assertIsomorphic(complete_kary(15, 2), nx.balanced_tree(2, 3))
+        self.assertIsomorphic(complete_kary(13, 3), nx.balanced_tree(3, 2))
+        
+        tree = spider(3, 4)
+        self.assertEqual(tree.order(), 13)
+        self.assertEqual(sorted(np.diff(tree.indptr).tolist()), [1] * 3 + [2] * 9 + [3])
+        
+        tree = caterpillar(4, 2)
+        self.assertEqual(tree.order(), 12)
+        self.assertEqual(sorted(np.diff(tree.indptr).tolist()), [1] * 8 + [3] * 2 + [4] * 2)
+    
+    def test_prufer(self):
+        tree = prufer_tree([3, 3, 3, 4])
+        self.assertEqual(set(map(frozenset, tree.edges())),
+                         {frozenset(edge) for edge in [(0, 3), (1, 3), (2, 3), (3, 4), (4, 5)]})
+        
+        for n in range(1, 30):
+            tree = random_prufer(n, rng=n)
+            self.assertEqual(tree.order(), n)
+            self.assertTrue(nx.is_tree(tree.to_networkx()))
+    
+    def test_family_tree(self):
+        for family in FAMILIES:
+            tree = family_tree(family, 100, rng=1)
+            self.assertTrue(nx.is_tree(tree.to_networkx()))
+            self.assertLessEqual(abs(tree.order() - 100), 10)
+        
+        with self.assertRaises(ValueError):
+            family_tree('forest', 10)
+    
+    def test_random_families(self):
+        for family in RANDOM_FAMILIES:
+            for n in range(1, 30):
+                tree = family_tree(family, n, rng=n)
+                self.assertEqual(tree.order(), n)
+                self.assertTrue(nx.is_tree(tree.to_networkx()))
+                self.assertEqual(tree.parent.tolist(), nx_parents(tree.to_networkx()))
+        
+        # Vertex i of a recursive tree joins an earlier vertex
+        parent = random_recursive(50, rng=0).parent
+        self.assertTrue(all(p < v for v, p in enumerate(parent.tolist()) if p >= 0))
+        self.assertTrue(max(np.diff(random_caterpillar(100, rng=2).indptr)) > 2)
+    
+    def test_fixture_trees(self):
+        # The trees are found from any working directory
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                names = [name for name, _ in fixture_trees()]
+            finally:
+                os.chdir(cwd)
+            
+            with self.assertRaises(FileNotFoundError):
+                list(fixture_trees(os.path.join(directory, 'trees')))
+        self.assertIn('cross', names)
+        self.assertEqual(names, sorted(names))
+            
+
+class TestBenchmark(unittest.TestCase):
+    
+    def test_without_fixtures(self):
+        # As installed, with no trees directory next to the package
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.jsonl')
+            arguments = ['--algs', 'burn_most_removed', '--sizes', '16', '--no-memory', '--output', output]
+            with mock.patch('graph_burning.benchmark.TREES_DIRECTORY', os.path.join(directory, 'trees')):
+                with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()) as error:
+                    benchmark.main(arguments)
+                    self.assertIn('fixtures are skipped', error.getvalue())
+                    with self.assertRaises(SystemExit):
+                        benchmark.main(arguments + ['--families', 'path', 'fixtures'])
+            
+            families = [result['family'] for result in benchmark.read_results(output)]
+        self.assertEqual(families, list(FAMILIES))
+    
+
+class TestInstrumentation(unittest.TestCase):
+    
+    def test_counters(self):
+        graph = nx.random_labeled_tree(80, seed=5)
+        collector = Collector()
+        
+        self.assertEqual(burn_tree(graph, collector=collector), burn_tree(graph))
+        self.assertEqual(burn_most_leaves_reroot(graph, collector=collector), burn_most_leaves_reroot(graph))
+        
+        self.assertEqual(collector.burns, 2)
+        self.assertEqual(sum(collector.counters['vertices marked']), 80)
+        self.assertEqual(sum(collector.counters['vertices removed']), 80)
+        self.assertEqual(collector.calls['setup'], 2)
+        self.assertIn('scoring', collector.report())
+    
+    def test_merge(self):
+        first, second = Collector(), Collector()
+        burn_most_removed(nx.path_graph(10), collector=first)
+        burn_most_removed(nx.path_graph(20), collector=second)
+        rounds = len(second.counters['candidates scored'])
+        
+        first.merge(second)
+        self.assertEqual(first.burns, 2)
+        self.assertEqual(len(first.counters['candidates scored']), rounds)
+        self.assertEqual(first.calls['setup'], 2)
+            
+
+class TestResultStore(unittest.TestCase):
+    
+    def test_store_and_query(self):
+        store = ResultStore(':memory:', batch_size=7)
+        for n in range(4, 9):
+            records = []
+            for layout in free_tree_layouts(n):
+                tree = tree_from_code(make_record(layout, 'md', 0)[2])
+                records.append(make_record(layout, 'md', len(burn_tree(tree)[0]), seconds=0.0))
+            store.add(records)
+        
+        self.assertEqual([row[:3] for row in store.summary()],
+                         [(n, 'md', count_free_trees(n)) for n in range(4, 9)])
+        self.assertEqual(len(store.query(n=8, alg='md')), 23)
+        self.assertEqual(len(store.query(alg='rrl')), 0)
+        for row in store.query(min_gap=1):
+            self.assertGreater(row[3], math.ceil(math.sqrt(row[0])))
+        
+        # Storing the same tree again replaces its record
+        layout = next(free_tree_layouts(8))
+        store.add([make_record(layout, 'md', 9)])
+        self.assertEqual(len(store.query(n=8, alg='md')), 23)
+        self.assertEqual(len(store.query(n=8, min_gap=6)), 1)
+        store.close()
+    
+    def test_tree_code(self):
+        for layout in free_tree_layouts(9):
+            tree = tree_from_code(make_record(layout, 'md', 0)[2])
+            self.assertEqual(list(tree.parent), list(level_sequence_to_parents(layout)))
+            
+
+def shuffled_copy(graph, seed):
+    '''Return the same tree with shuffled vertex names and vertex order.'''
+    rng = np.random.default_rng(seed)
+    names = rng.permutation(graph.order()).tolist()
+    shuffled = nx.Graph()
+    shuffled.add_nodes_from(rng.permutation(names).tolist())
+    shuffled.add_edges_from((names[u], names[v]) for u, v in graph.edges())
+    return shuffled
+
+
+class TestCanonicalForm(unittest.TestCase):
+    
+    def test_distinguishes_trees(self):
+        for n in range(2, 12):
+            codes = set(canonical_form(graph)[0] for graph in nx.nonisomorphic_trees(n))
+            self.assertEqual(len(codes), count_free_trees(n))
+    
+    def test_isomorphism(self):
+        for seed in range(10):
+            graph = nx.random_labeled_tree(40, seed=seed)
+            shuffled = shuffled_copy(graph, seed)
+            code, vertices = canonical_form(graph)
+            shuffled_code, shuffled_vertices = canonical_form(shuffled)
+            self.assertEqual(code, shuffled_code)
+            
+            # Matching positions of the canonical orders give an isomorphism
+            nodes, shuffled_nodes = list(graph.nodes()), list(shuffled.nodes())
+            mapping = {nodes[u]: shuffled_nodes[v] for u, v in zip(vertices, shuffled_vertices)}
+            self.assertTrue(all(shuffled.has_edge(mapping[u], mapping[v]) for u, v in graph.edges()))
+            
+
+class TestTreeMetrics(unittest.TestCase):
+    
+    def test_eccentricities(self):
+        for seed in range(5):
+            tree = nx.random_labeled_tree(50, seed=seed)
+            expected = nx.eccentricity(tree)
+            self.assertEqual(eccentricities(tree).tolist(), [expected[v] for v in tree])
+            self.assertEqual(diameter(tree)[2], max(expected.values()))
+    
+    def test_centres(self):
+        self.assertEqual(centres(path(7)), [3])
+        self.assertEqual(centres(path(8)), [3, 4])
+        self.assertEqual(centres(star(5)), [0])
+    
+    def test_within(self):
+        # Only distances to the vertices of within count, and only they can be centres
+        tree = nx.random_labeled_tree(40, seed=3)
+        within = np.zeros(40, dtype=bool)
+        within[np.random.default_rng(3).choice(40, 15, replace=False)] = True
+        distances = dict(nx.shortest_path_length(tree))
+        expected = [max(distances[v][w] for w in np.flatnonzero(within)) for v in range(40)]
+        self.assertEqual(eccentricities(tree, within).tolist(), expected)
+        
+        smallest = min(expected[v] for v in np.flatnonzero(within))
+        self.assertEqual(centres(tree, within), [v for v in np.flatnonzero(within) if expected[v] == smallest])
+    
+
+class TestBurningCache(unittest.TestCase):
+    
+    def test_hits_on_isomorphic_trees(self):
+        cache = BurningCache(maxsize=2)
+        graph = nx.random_labeled_tree(30, seed=1)
+        shuffled = shuffled_copy(graph, 1)
+        
+        first = cache.burn(graph, 'rrr', burn_most_removed)
+        second = cache.burn(shuffled, 'rrr', burn_most_removed)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(first, burn_most_removed(graph))
+        self.assertEqual(len(second), len(first))
+        self.assertEqual(verify_burning_sequence(shuffled, second), [])
+        
+        # The least recently used entry makes way for new ones
+        cache.burn(path(5), 'rrr', burn_most_removed)
+        cache.burn(path(6), 'rrr', burn_most_removed)
+        cache.burn(graph, 'rrr', burn_most_removed)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+    
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path_name = os.path.join(directory, 'cache.sqlite')
+            cache = BurningCache(path=path_name)
+            sequence = cache.burn(nx.path_graph(10), 'md', lambda tree: burn_tree(tree)[0])
+            cache.close()
+            
+            cache = BurningCache(path=path_name)
+            self.assertEqual(cache.burn(nx.path_graph(10), 'md', None), sequence)
+            self.assertEqual(cache.hits, 1)
+            cache.close()
+            
+
+class TestSweep(unittest.TestCase):
+    
+    def run_sweep(self, checkpoint_path, *arguments):
+        '''Run burn_all_trees.main, returning the lines it printed (less the timings in
+        the statistics) and the checkpoint it left.'''
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            burn_all_trees.main(['--checkpoint', checkpoint_path] + list(arguments))
+        lines = []
+        for line in output.getvalue().splitlines():
+            columns = line.split('|')
+            if len(columns) == 6:
+                del columns[4]
+            lines.append('|'.join(columns))
+        with open(checkpoint_path, 'r') as file:
+            return lines, json.load(file)
+    
+    def test_parse_algs(self):
+        self.assertEqual(parse_algs('all'), ['frl', 'rrl', 'md', 'rrr'])
+        self.assertEqual(parse_algs('md,exact'), ['md', 'exact'])
+        self.assertRaises(ValueError, parse_algs, 'md,foo')
+    
+    def test_shared_shard(self):
+        # Burning each tree once for all heuristics gives what separate sweeps give
+        algs = ['frl', 'rrl', 'md', 'rrr']
+        shared = burn_all_trees.burn_shard(algs, 9, 0, 47, None)
+        self.assertEqual(shared['trees'], 47)
+        for alg in algs:
+            alone = burn_all_trees.burn_shard([alg], 9, 0, 47, None)
+            self.assertEqual(alone['stats'][alg][:3], shared['stats'][alg][:3])
+            self.assertEqual(alone['counterexamples'],
+                             [example for example in shared['counterexamples'] if example[-1] == alg])
+    
+    def test_sample_shard(self):
+        # A shard draws the same trees wherever it runs
+        first = burn_all_trees.sample_shard(['md', 'rrr'], 'recursive', 60, 10, 5, seed=3)
+        second = burn_all_trees.sample_shard(['md', 'rrr'], 'recursive', 60, 10, 5, seed=3)
+        self.assertEqual(first['trees'], 5)
+        self.assertEqual(first['stats']['md'][:3], second['stats']['md'][:3])
+        self.assertEqual(first['counterexamples'], second['counterexamples'])
+        self.assertEqual(first['invalid'], [])
+    
+    def test_shared_sweep(self):
+        algs = ['md', 'rrr']
+        sweep = {'alg': algs, 'chunk_size': 7, 'prune': False, 'exact_check': False}
+        with tempfile.TemporaryDirectory() as directory:
+            reported = []
+            coordinator = threading.Thread(target=lambda: reported.extend(
+                coordinate(directory, sweep, [8, 9], lease_seconds=1, poll_seconds=0.05)))
+            coordinator.start()
+            
+            # A worker that claims a shard and dies without burning it
+            shards_path = os.path.join(directory, 'order_8', 'shards.json')
+            while not os.path.exists(shards_path):
+                time.sleep(0.01)
+            self.assertIsNotNone(Lease.claim(os.path.join(directory, 'order_8', '0.lease'), 1))
+            
+            burned = []
+            workers = [threading.Thread(target=lambda: burned.append(work(directory, algs, poll_seconds=0.05)))
+                       for _ in range(2)]
+            for worker in workers:
+                worker.start()
+            coordinator.join(60)
+            for worker in workers:
+                worker.join(60)
+            self.assertRaises(ValueError, work, directory, ['md'])
+        
+        # The shared sweep finds what one shard over each order finds, shard 0 included
+        self.assertEqual([n for n, _ in reported], [8, 9])
+        self.assertEqual(sum(burned), 4 + 7)
+        for n, result in reported:
+            whole = burn_all_trees.burn_shard(algs, n, 0, result['trees'], None)
+            self.assertEqual(result['trees'], [23, 47][n - 8])
+            self.assertEqual(len(result['counterexamples']), len(whole['counterexamples']))
+            for alg in algs:
+                self.assertEqual(result['stats'][alg][:3], whole['stats'][alg][:3])
+    
+    def test_workers(self):
+        # Shards burned in parallel are reported in the order one worker burns them
+        arguments = ['--alg', 'frl,rrr', '--min-order', '8', '--max-order', '10', '--chunk-size', '9']
+        with tempfile.TemporaryDirectory() as directory:
+            one = self.run_sweep(os.path.join(directory, 'one.json'), '--workers', '1', *arguments)
+            three = self.run_sweep(os.path.join(directory, 'three.json'), '--workers', '3', *arguments)
+        
+        self.assertEqual(three, one)
+        self.assertEqual(one[1]['total_trees'], 23 + 47 + 106)
+        self.assertGreater(len(one[1]['counterexamples']), 0)
+    
+    def test_resume(self):
+        arguments = ['--alg', 'frl,rrr', '--min-order', '8', '--max-order', '10', '--chunk-size', '9',
+                     '--checkpoint-interval', '0']
+        run_shards = burn_all_trees.run_shards
+        burned = []
+        
+        def interrupted(*shards):
+            # Stop the sweep after four shards: all three of order 8 and one of order 9
+            for result in run_shards(*shards):
+                if len(burned) == 4:
+                    raise KeyboardInterrupt
+                burned.append(result)
+                yield result
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.json')
+            with mock.patch('graph_burning.burn_all_trees.run_shards', interrupted):
+                with self.assertRaises(KeyboardInterrupt):
+                    self.run_sweep(path, *arguments)
+            with open(path, 'r') as file:
+                stopped = json.load(file)
+            self.assertEqual((stopped['order'], stopped['index'], stopped['total_trees']), (9, 9, 23 + 9))
+            
+            resumed = self.run_sweep(path, '--resume', *arguments)
+            whole = self.run_sweep(os.path.join(directory, 'whole.json'), *arguments)
+        
+        self.assertEqual(resumed[1], whole[1])
+        self.assertEqual(resumed[0][1], 'Resuming at order 9, tree 9 ({} counterexamples so far)'.format(
+            len(stopped['counterexamples'])))
+    
+    def test_concurrent_checkpoints(self):
+        # Two workers that burned the same shard write its result at the same time
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, '0.json')
+            errors = []
+            
+            def write(worker):
+                try:
+                    for i in range(400):
+                        burn_all_trees.save_checkpoint(path, {'worker': worker, 'i': i})
+                except OSError as error:
+                    errors.append(error)
+            
+            writers = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+            for writer in writers:
+                writer.start()
+            for writer in writers:
+                writer.join()
+            
+            self.assertEqual(errors, [])
+            with open(path, 'r') as file:
+                self.assertEqual(json.load(file)['i'], 399)
+            self.assertEqual(os.listdir(directory), ['0.json'])
+    
+    def test_lease_release(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, '0.lease')
+            with Lease.claim(path, 1) as lease:
+                self.assertTrue(lease.held())
+                self.assertIsNone(Lease.claim(path, 1))
+            self.assertFalse(os.path.exists(path))
+            
+            # The coordinator expires a lease and another worker claims the shard
+            with Lease.claim(path, 1) as lease:
+                os.remove(path)
+                other = Lease.claim(path, 1)
+                self.assertFalse(lease.held())
+            self.assertTrue(other.held())
+    
+
+class TestBurningService(unittest.TestCase):
+    
+    def test_preload(self):
+        # The forkserver imports the service before forking workers. eval is pickled by
+        # name, so running it imports nothing into the worker.
+        with ProcessPoolExecutor(1, mp_context=worker_context()) as pool:
+            imported = pool.submit(eval, "'graph_burning.burning_service' in __import__('sys').modules")
+            self.assertTrue(imported.result(timeout=60))
+    
+    def test_burn_request(self):
+        graph = nx.relabel_nodes(nx.path_graph(10), {v: 'v{}'.format(v) for v in range(10)})
+        response = burn_request(tree_request(graph, 'md,rrr', 7))
+        self.assertEqual(response['id'], 7)
+        self.assertEqual(response['n'], 10)
+        for alg in ['md', 'rrr']:
+            result = response['results'][alg]
+            self.assertTrue(result['valid'])
+            self.assertEqual(verify_burning_sequence(graph, result['sequence']), [])
+        
+        matrix = '\n'.join(' '.join(str(int(x)) for x in row) for row in nx.to_numpy_array(nx.star_graph(4)))
+        self.assertEqual(burn_request({'id': 1, 'alg': 'exact', 'mat': matrix})['results']['exact']['length'], 2)
+        self.assertIn('error', burn_request({'id': 2, 'alg': 'md', 'edges': [[0, 1], [1, 2], [2, 0]]}))
+        self.assertIn('error', burn_request({'id': 3, 'alg': 'none', 'edges': [[0, 1]]}))
+    
+    def test_stdio(self):
+        requests = [tree_request(random_prufer(30, i), 'md', i) for i in range(6)] + [{'id': 'bad'}]
+        process = subprocess.run([sys.executable, '-m', 'graph_burning.burning_service', '--workers', '2',
+                                  '--max-pending', '2'],
+                                 input=''.join(json.dumps(request, default=int) + '\n' for request in requests),
+                                 capture_output=True, text=True, timeout=120,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+        responses = {response['id']: response for response in map(json.loads, process.stdout.splitlines())}
+        self.assertEqual(set(responses), set(range(6)) | {'bad'})
+        self.assertTrue(all(responses[i]['results']['md']['valid'] for i in range(6)))
+        self.assertIn('error', responses['bad'])
+    
+
+class TestGraphBurning(unittest.TestCase):
+    
+    def test_graph_bfs(self):
+        graph = nx.petersen_graph()
+        indptr, indices, nodes, index = adjacency(graph)
+        dist, parent = graph_bfs(indptr, indices, [index[0]])
+        expected = nx.single_source_shortest_path_length(graph, 0)
+        self.assertEqual(dist.tolist(), [expected[v] for v in nodes])
+        self.assertTrue(all(graph.has_edge(nodes[v], nodes[p]) for v, p in enumerate(parent.tolist()) if p >= 0))
+    
+    def test_minimum_diameter_spanning_tree(self):
+        for graph in [nx.petersen_graph(), nx.cycle_graph(8), nx.ladder_graph(4), nx.gnp_random_graph(9, 0.35, seed=4)]:
+            indptr, indices, nodes, _ = adjacency(graph)
+            tree, centre = minimum_diameter_spanning_tree(indptr, indices)
+            self.assertTrue(all(graph.has_edge(nodes[u], nodes[v]) for u, v in tree.edges()))
+            self.assertEqual(nx.diameter(tree.to_networkx()),
+                             min(nx.diameter(spanning) for spanning in nx.SpanningTreeIterator(graph)))
+    
+    def test_burn_graph(self):
+        graph = nx.grid_2d_graph(6, 6)
+        burning_sequence, results = burn_graph(graph, 'md,rrr', num_trees=2)
+        self.assertEqual(verify_burning_sequence(graph, burning_sequence), [])
+        self.assertEqual(len(burning_sequence), min(len(result['sequence']) for result in results if result['valid']))
+        self.assertEqual(set(result['alg'] for result in results), {'md', 'rrr'})
+        
+        # A tree is its own only spanning tree
+        tree = random_prufer(40, rng=2)
+        burning_sequence, results = burn_graph(tree, 'md', num_trees=2)
+        self.assertEqual(verify_burning_sequence(tree, burning_sequence), [])
+        self.assertEqual(set(result['diameter'] for result in results), {nx.diameter(tree.to_networkx())})
+    
+        self.assertEqual(burn_graph(nx.Graph(), 'md'), ([], []))
+    
+    def test_library_imports(self):
+        # The graph API and the service do not load the sweep script
+        code = ('import sys, graph_burning.graphs, graph_burning.burning_service; '
+                'print(sorted(name for name in sys.modules if name.endswith(("burn_all_trees", "networkx"))))')
+        process = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=120,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(process.stdout.strip(), '[]', process.stderr)
+    
+    def test_no_valid_sequence(self):
+        # rrl's sequences for this tree leave vertex 5 unburned
+        edges = [(1, 0), (1, 2), (1, 3), (0, 4), (0, 6), (0, 7), (4, 5)]
+        burning_sequence, results = burn_graph(nx.Graph(edges), 'rrl')
+        self.assertIsNone(burning_sequence)
+        self.assertFalse(any(result['valid'] for result in results))
+    
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.txt')
+            with open(path, 'w') as file:
+                file.writelines('{} {}\n'.format(u, v) for u, v in edges)
+            process = subprocess.run([sys.executable, '-m', 'graph_burning.graphs', path, '--alg', 'rrl'],
+                                     capture_output=True, text=True, timeout=120,
+                                     cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertIn("No spanning tree gave a sequence that burns the graph", process.stdout)
+
+
+class TestLowerBounds(unittest.TestCase):
+    
+    def test_known_trees(self):
+        self.assertEqual(diameter_bound(path(10)), 4)
+        self.assertEqual(lower_bound(path(10)), 4)
+        self.assertEqual(lower_bound(star(10)), 2)
+        self.assertEqual(lower_bound(path(1)), 1)
+    
+    def test_packing(self):
+        tree = random_prufer(60, rng=5)
+        distances = TreeDistances(tree)
+        for distance in range(1, 8):
+            chosen = packing(tree, distance)
+            self.assertTrue(all(distances.dist(u, v) >= distance for u in chosen for v in chosen if u != v))
+        self.assertEqual(len(packing(tree, 1)), 60)
+        self.assertEqual(len(packing(tree, 3, limit=2)), 2)
+    
+    def test_bounds_are_certified(self):
+        for n in range(1, 11):
+            for parent in free_trees(n):
+                tree = CompactTree.from_parents(parent)
+                self.assertLessEqual(lower_bound(tree), burning_number(tree)[0])
+    
+    def test_prune(self):
+        algs = ['frl', 'rrl', 'md', 'rrr']
+        full = burn_all_trees.burn_shard(algs, 10, 0, 106, None)
+        pruned = burn_all_trees.burn_shard(algs, 10, 0, 106, None, prune=True)
+        
+        # Closed forms settle some trees, md runs first on every other tree, and the rest
+        # only where it does not settle it
+        settled = pruned['stats']['closed'][4]
+        self.assertGreater(settled, 0)
+        self.assertEqual(pruned['stats']['closed'][0], 0)
+        self.assertEqual(pruned['stats']['md'][4] + settled, 106)
+        self.assertTrue(all(pruned['stats'][alg][4] < pruned['stats']['md'][4] for alg in ['frl', 'rrl', 'rrr']))
+        full_examples = [example[:4] for example in full['counterexamples'] if example[-1] == 'md']
+        for example in pruned['counterexamples']:
+            self.assertIn(example[:4], full_examples)
+    
+
+class TestStructuredTrees(unittest.TestCase):
+    
+    def test_classify(self):
+        self.assertEqual(classify(path(1)), 'path')
+        self.assertEqual(classify(path(7)), 'path')
+        self.assertEqual(classify(star(6)), 'star')
+        self.assertEqual(classify(spider(3, 4)), 'spider')
+        self.assertEqual(classify(caterpillar(5, 2)), 'caterpillar')
+        self.assertIsNone(classify(complete_kary(15)))
+        for name, shape in [('path', 'path'), ('star', 'star'), ('fork', 'spider'), ('cross', 'spider')]:
+            self.assertEqual(classify(load_tree('../trees/{}.mat'.format(name))), shape)
+    
+    def test_closed_forms(self):
+        for n in range(0, 40):
+            shape, sequence = burn_structured(path(n))
+            self.assertEqual(len(sequence), math.ceil(math.sqrt(n)))
+            self.assertEqual(verify_burning_sequence(path(n), sequence), [])
+        self.assertEqual(burn_structured(star(9)), ('star', [0, 'x']))
+    
+    def test_certified(self):
+        # Sequences come back only when they are optimal
+        for n in range(1, 11):
+            for parent in free_trees(n):
+                tree = CompactTree.from_parents(parent)
+                shape, sequence = burn_structured(tree, lower_bound(tree))
+                if shape in ('path', 'star'):
+                    self.assertIsNotNone(sequence)
+                if sequence is not None:
+                    self.assertEqual(verify_burning_sequence(tree, sequence), [])
+                    self.assertEqual(len(sequence), burning_number(tree)[0])
+        
+        # The order of the radii along the spine matters for caterpillars
+        tree = nx.Graph([(4, 3), (3, 2), (2, 1), (1, 0), (0, 6), (6, 7), (7, 8), (1, 5), (0, 9)])
+        self.assertEqual(burning_number(tree)[0], 3)
+        shape, sequence = burn_structured(tree, 3)
+        self.assertEqual(shape, 'caterpillar')
+        self.assertEqual(verify_burning_sequence(tree, sequence), [])
+    
+
+class TestIncremental(unittest.TestCase):
+    
+    def test_tree_code(self):
+        for n in range(1, 12):
+            codes = set(tree_code(neighbour_lists(CompactTree.from_parents(parent)))[0] for parent in free_trees(n))
+            self.assertEqual(len(codes), count_free_trees(n))
+        
+        for seed in range(10):
+            graph = nx.random_labeled_tree(40, seed=seed)
+            neighbours = neighbour_lists(CompactTree.from_networkx(graph))
+            shuffled = neighbour_lists(CompactTree.from_networkx(shuffled_copy(graph, seed)))
+            code, vertices = tree_code(neighbours)
+            shuffled_code, shuffled_vertices = tree_code(shuffled)
+            self.assertEqual(code, shuffled_code)
+            mapping = dict(zip(vertices, shuffled_vertices))
+            for v in range(40):
+                self.assertEqual(sorted(mapping[u] for u in neighbours[v]), sorted(shuffled[mapping[v]]))
+        
+        # Leaving out a leaf gives the code of the smaller tree
+        neighbours = neighbour_lists(CompactTree.from_networkx(nx.path_graph(5)))
+        self.assertEqual(tree_code(neighbours, skip=0)[0],
+                         tree_code(neighbour_lists(CompactTree.from_networkx(nx.path_graph(4))))[0])
+    
+    def test_incremental_sweep(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'summaries.db')
+            store = SummaryStore(path)
+            for n in range(2, 11):
+                result = burn_all_trees.burn_shard(['md'], n, 0, count_free_trees(n), None, summary_path=path)
+                self.assertEqual(len(result['summaries']), count_free_trees(n))
+                store.add(result['summaries'])
+                store.flush()
+            
+            # Derived sequences settle most trees of order 10, and md burns the rest
+            settled = result['stats']['derived'][4]
+            self.assertGreater(settled, 50)
+            self.assertEqual(result['stats']['md'][4] + settled, 106)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                burn_all_trees.print_stats(result['trees'], result['stats'])
+            lines = output.getvalue().splitlines()
+            self.assertTrue(lines[0].startswith('Derived sequences for {} trees'.format(settled)))
+            self.assertTrue(lines[0].endswith('handed {} to the algorithms'.format(106 - settled)))
+            self.assertEqual([line.split()[0] for line in lines[2:] if line], ['md'])
+            full = burn_all_trees.burn_shard(['md'], 10, 0, 106, None)
+            for example in result['counterexamples']:
+                self.assertIn(example, full['counterexamples'])
+            
+            for parent in free_trees(11):
+                tree = CompactTree.from_parents(parent)
+                sequence = derive_sequence(neighbour_lists(tree), lambda code: store.get(10, code))
+                self.assertEqual(verify_burning_sequence(tree, sequence), [])
+            store.close()
+    
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file